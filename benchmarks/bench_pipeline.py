@@ -0,0 +1,209 @@
+"""
+Times and memory-profiles each pipeline stage on synthetic sales files
+
+For every scale a messy file is generated with benchmarks.generate_data,
+then streamed through parse_and_validate_table into a TransactionTable,
+aggregated, turned into the analytics views and rendered as a report.
+No stage holds the raw lines or a dictionary per row, so 10M+ row files
+fit in memory. Each stage records wall time, rows/sec and (unless
+--no-tracemalloc) the tracemalloc retained and peak deltas. Results are written as JSON so runs can be
+compared across commits.
+
+Run from the project root:
+    python -m benchmarks.bench_pipeline --rows 10000 100000 1000000
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generate_data import generate_sales_file
+from utils.file_handler import iter_sales_data
+from utils.data_processor import (
+    parse_and_validate_table,
+    aggregate_sales,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+from utils.report_generator import generate_sales_report
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+def _git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+class StageTimer:
+    """
+    Runs pipeline stages one after another and records a result per stage
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def run(self, name, rows, func, *args, **kwargs):
+        """
+        Calls func, silencing its console output, and records its cost
+        Returns: whatever func returns
+        """
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        stage = {
+            'stage': name,
+            'rows': rows,
+            'seconds': round(elapsed, 6),
+            'rows_per_sec': round(rows / elapsed) if elapsed else None
+        }
+
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            stage['retained_bytes'] = current - before
+            stage['peak_bytes'] = peak - before
+
+        self.stages.append(stage)
+        return result
+
+def _analytics(aggregate):
+    return {
+        'total_revenue': calculate_total_revenue(aggregate),
+        'regions': region_wise_sales(aggregate),
+        'top_products': top_selling_products(aggregate),
+        'customers': customer_analysis(aggregate),
+        'daily': daily_sales_trend(aggregate),
+        'peak_day': find_peak_sales_day(aggregate),
+        'low_products': low_performing_products(aggregate)
+    }
+
+def _count_lines(data_file):
+    return sum(1 for _ in iter_sales_data(data_file))
+
+def bench_scale(data_file, rows, report_file, trace_memory=True):
+    """
+    Runs every stage once over one generated file
+    Returns: list of stage result dictionaries
+    """
+
+    timer = StageTimer(trace_memory)
+
+    # Reading alone, so it can be subtracted from the streamed stage below
+    lines = timer.run('read', rows, _count_lines, data_file)
+
+    valid, _ = timer.run(
+        'parse_validate', lines, parse_and_validate_table, iter_sales_data(data_file)
+    )
+    aggregate = timer.run('aggregate', len(valid), aggregate_sales, valid)
+    timer.run('analytics', len(valid), _analytics, aggregate)
+    timer.run(
+        'report', len(valid), generate_sales_report,
+        None, None,
+        output_file=report_file,
+        aggregate=aggregate,
+        enrichment_summary=None
+    )
+
+    return timer.stages
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sales pipeline at several scales")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS,
+                        help="data row counts to benchmark (default 10k 100k 1M)")
+    parser.add_argument('--output', default=None,
+                        help="JSON results file (default benchmarks/results/pipeline-<timestamp>.json)")
+    parser.add_argument('--data-dir', default=None,
+                        help="keep generated files here and reuse them on later runs")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--messy-rate', type=float, default=0.1)
+    parser.add_argument('--no-tracemalloc', action='store_true',
+                        help="time stages without tracemalloc, which slows allocation-heavy code")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    trace_memory = not args.no_tracemalloc
+
+    started = datetime.datetime.now()
+    results = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'started_at': started.isoformat(timespec='seconds'),
+        'seed': args.seed,
+        'messy_rate': args.messy_rate,
+        'tracemalloc': trace_memory,
+        'scales': []
+    }
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"pipeline-{started:%Y%m%d-%H%M%S}.json"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir or tmp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        report_file = os.path.join(tmp_dir, 'sales_report.txt')
+
+        print(f"{'Rows':>12}  {'Stage':<14}  {'Seconds':>9}  {'Rows/s':>12}  {'Peak MB':>8}")
+
+        for rows in args.rows:
+            data_file = os.path.join(data_dir, f"sales_{rows}_{args.seed}_{args.messy_rate}.txt")
+            if not os.path.exists(data_file):
+                generate_sales_file(data_file, rows, seed=args.seed, messy_rate=args.messy_rate)
+
+            if trace_memory:
+                tracemalloc.start()
+            try:
+                stages = bench_scale(data_file, rows, report_file, trace_memory)
+            finally:
+                if trace_memory:
+                    tracemalloc.stop()
+
+            results['scales'].append({
+                'rows': rows,
+                'file_bytes': os.path.getsize(data_file),
+                'stages': stages
+            })
+
+            for stage in stages:
+                peak = f"{stage['peak_bytes'] / 2**20:8.1f}" if trace_memory else f"{'-':>8}"
+                print(f"{rows:>12,}  {stage['stage']:<14}  {stage['seconds']:>9.4f}  "
+                      f"{stage['rows_per_sec'] or 0:>12,}  {peak}")
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
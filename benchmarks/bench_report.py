@@ -0,0 +1,82 @@
+"""
+Benchmarks report rendering from a precomputed SalesAggregate
+
+The number of regions, products, customers and dates is held fixed while
+the row count grows, so aggregation time should scale with rows and
+report time should stay flat.
+
+Run from the project root:
+    python -m benchmarks.bench_report
+"""
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from utils.data_processor import aggregate_sales
+from utils.report_generator import generate_sales_report
+
+ROW_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+
+REGIONS = ['North', 'South', 'East', 'West']
+PRODUCTS = [f"Product {i}" for i in range(50)]
+CUSTOMERS = [f"C{i:03d}" for i in range(200)]
+DATES = [f"2024-12-{day:02d}" for day in range(1, 32)]
+
+def make_transactions(count, seed=42):
+    """
+    Builds synthetic validated transactions over a fixed set of groups
+    Returns: list of transaction dictionaries
+    """
+
+    rng = random.Random(seed)
+    transactions = []
+
+    for i in range(count):
+        product_index = rng.randrange(len(PRODUCTS))
+        transactions.append({
+            'TransactionID': f"T{i}",
+            'Date': rng.choice(DATES),
+            'ProductID': f"P{100 + product_index}",
+            'ProductName': PRODUCTS[product_index],
+            'Quantity': rng.randint(1, 10),
+            'UnitPrice': float(rng.randint(100, 5000)),
+            'CustomerID': rng.choice(CUSTOMERS),
+            'Region': rng.choice(REGIONS)
+        })
+
+    return transactions
+
+def main():
+    enrichment_summary = {'total': 0, 'enriched': 0, 'failed_products': set()}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = os.path.join(tmp_dir, 'sales_report.txt')
+
+        print(f"{'Rows':>10}  {'Aggregate (s)':>14}  {'Report (s)':>11}")
+
+        for count in ROW_COUNTS:
+            transactions = make_transactions(count)
+
+            start = time.perf_counter()
+            aggregate = aggregate_sales(transactions)
+            aggregate_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_sales_report(
+                    None,
+                    None,
+                    output_file=output_file,
+                    aggregate=aggregate,
+                    enrichment_summary=enrichment_summary
+                )
+            report_time = time.perf_counter() - start
+
+            print(f"{count:>10,}  {aggregate_time:>14.4f}  {report_time:>11.4f}")
+
+if __name__ == "__main__":
+    main()
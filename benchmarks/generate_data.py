@@ -0,0 +1,179 @@
+"""
+Generates synthetic sales files in the same messy format as data/sales_data.txt
+
+Most rows are valid. A configurable share is corrupted the way the real
+export is: thousands separators in Quantity/UnitPrice and commas in
+ProductName (both still valid after cleaning), repeated TransactionIDs
+(kept unless --dedup is used), DD/MM/YYYY dates (kept as-is, but
+rejected by the partitioned store), prices with three decimals (rounded
+to paise), plus bad TransactionIDs, zero quantities,
+negative prices, missing CustomerID or Region and rows with the wrong
+number of fields (all rejected).
+
+Run from the project root:
+    python -m benchmarks.generate_data 1000000 -o data/sales_1m.txt
+"""
+
+import argparse
+import datetime
+import random
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+REGIONS = ['North', 'South', 'East', 'West']
+
+# (base name, optional suffix that the export joins with a comma, price range)
+BASE_PRODUCTS = [
+    ('Laptop', 'Premium', (45000, 90000)),
+    ('Mouse', 'Wireless', (250, 1500)),
+    ('Keyboard', 'Mechanical', (800, 4000)),
+    ('Monitor', 'LED', (8000, 25000)),
+    ('Webcam', 'HD', (1500, 5000)),
+    ('Headphones', 'Noise Cancelling', (1000, 8000)),
+    ('USB Cable', 'Type-C', (150, 800)),
+    ('External Hard Drive', '1TB', (3000, 9000)),
+    ('Wireless Mouse', 'Gaming', (500, 2500)),
+    ('Laptop Charger', '65W', (1200, 3500))
+]
+
+# Share of each kind of corruption among messy rows
+MESSY_KINDS = [
+    ('thousands', 0.25),
+    ('name_comma', 0.25),
+    ('bad_transaction_id', 0.1),
+    ('zero_quantity', 0.1),
+    ('negative_price', 0.1),
+    ('missing_customer', 0.05),
+    ('missing_region', 0.05),
+    ('wrong_field_count', 0.1),
+    ('duplicate_id', 0.05),
+    ('non_iso_date', 0.05),
+    ('sub_paise_price', 0.05)
+]
+
+def build_catalog(product_count):
+    """
+    Builds product_count products by cycling through the base products
+    Returns: list of (ProductID, ProductName, suffix, (low, high) price)
+    """
+
+    catalog = []
+    for i in range(product_count):
+        name, suffix, prices = BASE_PRODUCTS[i % len(BASE_PRODUCTS)]
+        series = i // len(BASE_PRODUCTS)
+        if series:
+            name = f"{name} {series + 1}"
+        catalog.append((f"P{101 + i}", name, suffix, prices))
+    return catalog
+
+def _thousands(value):
+    return f"{value:,}"
+
+def iter_sales_rows(rows, seed=42, messy_rate=0.1, products=10, customers=25,
+                    start_date='2024-12-01', days=31):
+    """
+    Yields synthetic sales file lines (without the header or newline)
+    Output is deterministic for a given seed.
+    """
+
+    rng = random.Random(seed)
+    catalog = build_catalog(products)
+    first_day = datetime.date.fromisoformat(start_date)
+    dates = [(first_day + datetime.timedelta(days=offset)).isoformat() for offset in range(days)]
+    customer_ids = [f"C{i:03d}" for i in range(1, customers + 1)]
+
+    kinds = [kind for kind, _ in MESSY_KINDS]
+    weights = [weight for _, weight in MESSY_KINDS]
+
+    for i in range(rows):
+        product_id, name, suffix, (low, high) = rng.choice(catalog)
+
+        transaction_id = f"T{i + 1:07d}"
+        date = rng.choice(dates)
+        quantity = str(rng.randint(1, 10))
+        price = str(rng.randint(low, high))
+        customer_id = rng.choice(customer_ids)
+        region = rng.choice(REGIONS)
+
+        if rng.random() < messy_rate:
+            kind = rng.choices(kinds, weights)[0]
+
+            if kind == 'thousands':
+                price = _thousands(int(price))
+            elif kind == 'name_comma':
+                name = f"{name},{suffix}"
+            elif kind == 'bad_transaction_id':
+                transaction_id = f"X{rng.randint(1, 999)}"
+            elif kind == 'zero_quantity':
+                quantity = '0'
+            elif kind == 'negative_price':
+                price = f"-{price}"
+            elif kind == 'missing_customer':
+                customer_id = ''
+            elif kind == 'missing_region':
+                region = ''
+            elif kind == 'sub_paise_price':
+                price = f"{price}.{rng.randint(0, 999):03d}"
+            elif kind == 'non_iso_date':
+                year, month, day = date.split('-')
+                date = f"{day}/{month}/{year}"
+            elif kind == 'duplicate_id' and i:
+                # A replayed export row reuses an earlier TransactionID
+                transaction_id = f"T{rng.randint(1, i):07d}"
+            elif kind == 'wrong_field_count':
+                # A split line: the row is cut off after the product name
+                yield '|'.join([transaction_id, date, product_id, name])
+                continue
+
+        yield '|'.join([transaction_id, date, product_id, name, quantity, price, customer_id, region])
+
+def generate_sales_file(filename, rows, encoding='utf-8', **options):
+    """
+    Writes a synthetic sales file with a header and rows data lines
+    Keyword options are passed to iter_sales_rows.
+    """
+
+    with open(filename, 'w', encoding=encoding, newline='\n') as file:
+        file.write(HEADER + '\n')
+
+        batch = []
+        for line in iter_sales_rows(rows, **options):
+            batch.append(line)
+            if len(batch) >= 10000:
+                file.write('\n'.join(batch) + '\n')
+                batch = []
+        if batch:
+            file.write('\n'.join(batch) + '\n')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic messy sales file")
+    parser.add_argument('rows', type=int, help="number of data rows to write")
+    parser.add_argument('-o', '--output', default='data/synthetic_sales_data.txt',
+                        help="file to write (default data/synthetic_sales_data.txt)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--messy-rate', type=float, default=0.1,
+                        help="share of rows with data quality issues (default 0.1)")
+    parser.add_argument('--products', type=int, default=10)
+    parser.add_argument('--customers', type=int, default=25)
+    parser.add_argument('--start-date', default='2024-12-01')
+    parser.add_argument('--days', type=int, default=31)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    generate_sales_file(
+        args.output,
+        args.rows,
+        seed=args.seed,
+        messy_rate=args.messy_rate,
+        products=args.products,
+        customers=args.customers,
+        start_date=args.start_date,
+        days=args.days
+    )
+
+    print(f"Wrote {args.rows:,} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
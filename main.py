@@ -1,131 +1,759 @@
-from utils.file_handler import read_sales_data
+import argparse
+import glob
+import os
+import time
+import threading
+from concurrent.futures import Future
+
+from utils.file_handler import iter_sales_data, iter_sales_data_mmap
 from utils.data_processor import (
-    parse_transactions,
+    parse_and_validate,
+    parse_and_validate_parallel,
     validate_and_filter,
+    aggregate_sales,
     calculate_total_revenue,
     region_wise_sales,
     top_selling_products,
+    heavy_hitter_products,
+    heavy_hitter_customers,
     customer_analysis,
     daily_sales_trend,
     find_peak_sales_day,
     low_performing_products
 )
 from utils.api_handler import (
+    PRODUCTS_URL,
     fetch_all_products,
     create_product_mapping,
-    enrich_sales_data
+    enrich_sales_data,
+    save_enriched_data,
+    summarize_enrichment
 )
 from utils.report_generator import generate_sales_report
+from utils.checkpoint import update_incremental, SalesFollower
+from utils.transaction_index import TransactionIndex, filter_options
+from utils.query_service import serve
+from utils.profiler import RunProfiler
+from utils.dedup import DEDUP_MODES, make_deduplicator, drop_duplicates
+from utils.cube import SEGMENTS, build_cube, save_cube, load_cube
+from utils.partitions import GRANULARITIES, ingest_partitions, read_partitions
+from utils.mapreduce import aggregate_files, save_state, reduce_states
 
 
-def main():
+def parse_args(argv=None):
     """
-    Main execution function for Sales Analytics System
+    Parses command line options for the Sales Analytics System
+    """
+
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument(
+        'command', nargs='?', choices=['run', 'serve', 'report', 'ingest', 'map', 'reduce'],
+        default='run',
+        help="run the full pipeline once (default), serve analytics over HTTP, "
+             "regenerate the report from the saved cube, ingest the sales file "
+             "into the --partitions store, aggregate sales files into a state file "
+             "(map), or merge state files into a report (reduce)"
+    )
+    parser.add_argument(
+        'paths', nargs='*',
+        help="sales files for map, or state files for reduce (glob patterns allowed)"
+    )
+    parser.add_argument(
+        '--data-file', default='data/sales_data.txt',
+        help="pipe-delimited sales file to analyse"
+    )
+    parser.add_argument(
+        '--mmap', action='store_true',
+        help="parse the sales file in place through a memory map"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="parse the sales file on this many processes (default: 1)"
+    )
+    parser.add_argument(
+        '--api-url', default=PRODUCTS_URL,
+        help="product catalog endpoint"
+    )
+    parser.add_argument(
+        '--catalog-cache', default='data/product_catalog.json',
+        help="on-disk product catalog cache (empty string disables it)"
+    )
+    parser.add_argument(
+        '--catalog-ttl', type=float, default=86400,
+        help="seconds a cached catalog is used without contacting the API"
+    )
+    parser.add_argument(
+        '--api-workers', type=int, default=8,
+        help="concurrent catalog page requests"
+    )
+    parser.add_argument(
+        '--enriched-format', choices=['text', 'columnar'], default='text',
+        help="write enriched data as pipe text or the memory-mappable columnar format"
+    )
+    parser.add_argument(
+        '--distinct', choices=['exact', 'hll'], default='exact',
+        help="count unique customers/products exactly or with HyperLogLog sketches"
+    )
+    parser.add_argument(
+        '--hll-precision', type=int, default=12,
+        help="HyperLogLog precision (4-16); error is about 1.04/sqrt(2**p)"
+    )
+    parser.add_argument(
+        '--top-k', choices=['exact', 'sketch'], default='exact',
+        help="rank top products and customers exactly, or with fixed-memory "
+             "Space-Saving sketches (run and serve only)"
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help="only process lines appended since the last checkpointed run"
+    )
+    parser.add_argument(
+        '--checkpoint', default='output/checkpoint.json',
+        help="checkpoint file used by --incremental and --follow"
+    )
+    parser.add_argument(
+        '--follow', action='store_true',
+        help="keep running, folding lines appended to the sales file into the report as they arrive"
+    )
+    parser.add_argument(
+        '--poll-interval', type=float, default=1.0,
+        help="seconds between checks for new lines in --follow mode"
+    )
+    parser.add_argument(
+        '--debounce', type=float, default=5.0,
+        help="minimum seconds between report rewrites in --follow mode"
+    )
+    parser.add_argument(
+        '--host', default='127.0.0.1',
+        help="address the serve command listens on"
+    )
+    parser.add_argument(
+        '--port', type=int, default=8000,
+        help="port the serve command listens on"
+    )
+    parser.add_argument(
+        '--reload-interval', type=float, default=5.0,
+        help="seconds between checks for a changed sales file while serving"
+    )
+    parser.add_argument(
+        '--dedup', choices=DEDUP_MODES,
+        help="drop repeated TransactionIDs, keeping the first (exact set or bounded-memory Bloom filter); "
+             "run and ingest only"
+    )
+    parser.add_argument(
+        '--dedup-capacity', type=int, default=10_000_000,
+        help="TransactionIDs the Bloom filter is sized for"
+    )
+    parser.add_argument(
+        '--dedup-error-rate', type=float, default=0.001,
+        help="target Bloom filter false-positive rate at capacity"
+    )
+    parser.add_argument(
+        '--dedup-max-mb', type=float,
+        help="memory ceiling for the Bloom filter in MB"
+    )
+    parser.add_argument(
+        '--state', metavar='PATH',
+        help="aggregate state written by map (default output/partial_state.json) "
+             "or, optionally, the merged state written by reduce"
+    )
+    parser.add_argument(
+        '--cube', default='output/sales_cube.json',
+        help="rollup cube written by --save-cube and read by the report command"
+    )
+    parser.add_argument(
+        '--save-cube', action='store_true',
+        help="persist a (date, region, product, customer segment) rollup cube after validation"
+    )
+    parser.add_argument(
+        '--cube-segment', choices=SEGMENTS, default='customer',
+        help="customer segmentation of the cube; 'none' drops customer-level analytics"
+    )
+    parser.add_argument(
+        '--partitions', metavar='DIR',
+        help="date-partitioned store written by the ingest command; run reads from it instead of --data-file"
+    )
+    parser.add_argument(
+        '--partition-by', choices=GRANULARITIES, default='month',
+        help="partition size used when the ingest command creates a store"
+    )
+    parser.add_argument(
+        '--start-date', help="first date (YYYY-MM-DD) read from --partitions or the cube"
+    )
+    parser.add_argument(
+        '--end-date', help="last date (YYYY-MM-DD) read from --partitions or the cube"
+    )
+    parser.add_argument(
+        '--region', help="single region read from --partitions or the cube"
+    )
+    parser.add_argument(
+        '--profile', metavar='PATH',
+        help="write a JSON run profile (per-stage time, rows/sec, memory, API latency)"
+    )
+    parser.add_argument(
+        '--profile-memory', action='store_true',
+        help="add tracemalloc allocation deltas to the run profile (slower)"
+    )
+    parser.add_argument(
+        '--cprofile-dir', metavar='DIR',
+        help="write a cProfile dump for every stage into this directory"
+    )
+
+    return parser.parse_args(argv)
+
+
+def run_incremental(args, profiler):
+    """
+    Updates the checkpointed aggregate with newly appended sales lines and
+    regenerates the report from it
+    """
+
+    try:
+        print("=" * 40)
+        print("   SALES ANALYTICS SYSTEM (INCREMENTAL)")
+        print("=" * 40)
+
+        print(f"\n[1/2] Updating checkpoint {args.checkpoint}...")
+        with profiler.stage('checkpoint') as stage:
+            sales_aggregate, stats = update_incremental(
+                args.data_file, args.checkpoint,
+                distinct=args.distinct, precision=args.hll_precision
+            )
+            stage['rows'] = stats['new_rows']
+
+        if stats['mode'] == 'full':
+            print("✓ No matching checkpoint, rebuilt from the start of the file")
+        print(f"✓ Read {stats['bytes_read']:,} bytes, {stats['new_rows']} new valid rows "
+              f"({stats['total_rows']} total)")
+
+        print("\n[2/2] Generating report...")
+        with profiler.stage('report'):
+            generate_sales_report(None, None, aggregate=sales_aggregate)
+        print("✓ Report saved to: output/sales_report.txt")
+        print("=" * 40)
+
+    except Exception as e:
+        print("\n❌ An error occurred while running the system.")
+        print("Error details:", e)
+        print("Please check your input files or configuration.")
+
+def run_follow(args, profiler):
+    """
+    Tails the sales file, validating only newly appended lines and folding
+    them into the running aggregate; the report is rewritten at most once
+    per debounce interval, and only when something changed
+    """
+
+    try:
+        print("=" * 40)
+        print("   SALES ANALYTICS SYSTEM (FOLLOW)")
+        print("=" * 40)
+
+        print(f"\nCatching up on {args.data_file}...")
+        with profiler.stage('catch_up') as stage:
+            follower = SalesFollower(
+                args.data_file, args.checkpoint,
+                distinct=args.distinct, precision=args.hll_precision
+            )
+            stage['rows'] = follower.aggregate.transaction_count
+
+        if follower.mode == 'full':
+            print("✓ No matching checkpoint, read from the start of the file")
+        print(f"✓ {follower.aggregate.transaction_count} valid rows")
+
+        pending = True
+        last_render = None
+
+        def flush():
+            follower.save()
+            generate_sales_report(None, None, aggregate=follower.aggregate)
+
+        # Polls are not profiled individually; the profile would grow without bound
+        print(f"\nFollowing {args.data_file} (Ctrl+C to stop)...")
+        try:
+            while True:
+                now = time.monotonic()
+                if pending and (last_render is None or now - last_render >= args.debounce):
+                    flush()
+                    last_render = now
+                    pending = False
+
+                time.sleep(args.poll_interval)
+
+                new_rows = follower.poll()
+                if new_rows:
+                    print(f"✓ {new_rows} new valid rows "
+                          f"({follower.aggregate.transaction_count} total)")
+                    pending = True
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            # Rows folded in since the last render are never lost, even on errors
+            if pending:
+                flush()
+            follower.close()
+
+        print("\nStopped following; report saved to: output/sales_report.txt")
+        print("=" * 40)
+
+    except Exception as e:
+        print("\n❌ An error occurred while running the system.")
+        print("Error details:", e)
+        print("Please check your input files or configuration.")
+
+def run_cube_report(args, profiler):
+    """
+    Regenerates the report from the persisted rollup cube, optionally for a
+    date window or a single region, without reading the raw sales file
     """
 
+    try:
+        print("=" * 40)
+        print("   SALES ANALYTICS SYSTEM (FROM CUBE)")
+        print("=" * 40)
+
+        print(f"\n[1/2] Loading cube {args.cube}...")
+        with profiler.stage('load_cube') as stage:
+            cube = load_cube(args.cube)
+            sales_aggregate = cube.to_aggregate(
+                start_date=args.start_date, end_date=args.end_date, region=args.region
+            )
+            stage['rows'] = len(cube.cells)
+        print(f"✓ {len(cube.cells)} cells, {sales_aggregate.transaction_count} transactions selected")
+
+        if not sales_aggregate.transaction_count:
+            print("No transactions in the selected window; report not generated.")
+            return
+
+        print("\n[2/2] Generating report...")
+        with profiler.stage('report'):
+            generate_sales_report(None, None, aggregate=sales_aggregate)
+        print("✓ Report saved to: output/sales_report.txt")
+        print("=" * 40)
+
+    except Exception as e:
+        print("\n❌ An error occurred while running the system.")
+        print("Error details:", e)
+        print("Please check your input files or configuration.")
+
+def run_ingest(args, profiler):
+    """
+    Validates the sales file (or the lines appended since it was last
+    ingested) and adds them to the date-partitioned store
+    """
+
+    if not args.partitions:
+        print("The ingest command needs --partitions DIR.")
+        return
+
+    try:
+        print(f"Ingesting {args.data_file} into {args.partitions} (by {args.partition_by})...")
+
+        deduplicator = None
+        if args.dedup:
+            deduplicator = make_deduplicator(
+                args.dedup,
+                capacity=args.dedup_capacity,
+                error_rate=args.dedup_error_rate,
+                max_bytes=int(args.dedup_max_mb * 2**20) if args.dedup_max_mb else None
+            )
+
+        with profiler.stage('ingest') as stage:
+            stats = ingest_partitions(
+                args.data_file, args.partitions, args.partition_by, deduplicator=deduplicator
+            )
+            stage['rows'] = stats['rows']
+
+        if stats['skipped']:
+            print("✓ No new lines since the last ingest, nothing to do")
+            return
+
+        rejected = ", ".join(f"{rule}={count}" for rule, count in stats['rejected'].items() if count)
+        print(f"✓ Wrote {stats['rows']} rows to {stats['partitions_written']} partitions")
+        print("Rejected by rule:", rejected or "none")
+
+    except (OSError, ValueError) as e:
+        print("\n❌ An error occurred while ingesting.")
+        print("Error details:", e)
+
+def _expand_paths(patterns):
+    paths = {}
+    for pattern in patterns:
+        # Patterns that match nothing are kept so the error names them
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            # A file matched by several patterns (or spellings) is used once
+            paths.setdefault(os.path.abspath(path), path)
+    return list(paths.values())
+
+def run_map(args, profiler):
+    """
+    Aggregates one or more sales files into a mergeable state file
+    """
+
+    filenames = _expand_paths(args.paths) or [args.data_file]
+    state_path = args.state or 'output/partial_state.json'
+
+    try:
+        print(f"Aggregating {len(filenames)} file(s) on up to {args.workers} process(es)...")
+        with profiler.stage('map') as stage:
+            sales_aggregate, sources = aggregate_files(
+                filenames, workers=args.workers,
+                distinct=args.distinct, precision=args.hll_precision
+            )
+            stage['rows'] = sales_aggregate.transaction_count
+
+        save_state(sales_aggregate, state_path, sources=sources)
+        print(f"✓ {sales_aggregate.transaction_count} valid transactions, state saved to: {state_path}")
+
+    except (OSError, ValueError) as e:
+        print("\n❌ An error occurred while aggregating.")
+        print("Error details:", e)
+
+def run_reduce(args, profiler):
+    """
+    Merges state files from map (or earlier reduces) and renders the report
+    """
+
+    filenames = _expand_paths(args.paths)
+    if not filenames:
+        print("The reduce command needs one or more state files.")
+        return
+
+    try:
+        print(f"Merging {len(filenames)} state file(s)...")
+        with profiler.stage('reduce') as stage:
+            sales_aggregate, sources = reduce_states(filenames)
+            stage['rows'] = sales_aggregate.transaction_count
+        print(f"✓ {sales_aggregate.transaction_count} transactions from {len(sources)} source file(s)")
+
+        if args.state:
+            # A merged state can itself be reduced again further up the tree
+            save_state(sales_aggregate, args.state, sources=sources)
+            print(f"✓ Merged state saved to: {args.state}")
+
+        with profiler.stage('report'):
+            generate_sales_report(None, None, aggregate=sales_aggregate)
+        print("✓ Report saved to: output/sales_report.txt")
+
+    except (OSError, ValueError) as e:
+        print("\n❌ An error occurred while merging.")
+        print("Error details:", e)
+
+def _collect(messages):
+    # Buffers status lines from a background task so they print in step order
+    return lambda *parts: messages.append(" ".join(map(str, parts)))
+
+def _start_thread(func, *args, daemon=False, **kwargs):
+    # Runs func on its own thread and returns a Future for its result.
+    # Daemon threads are not joined at interpreter exit, unlike the
+    # workers of a ThreadPoolExecutor.
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=daemon).start()
+    return future
+
+def run_pipeline(args, profiler):
+    """
+    Runs the ten pipeline steps once, timing each one in profiler
+    The catalog fetch (or cache load) starts on a background thread before
+    the sales file is read and is joined at step 6, and the enriched data
+    is written while the report renders.
+    """
+
+    # Set on the way out so an abandoned fetch stops retrying
+    cancel_fetch = threading.Event()
+
     try:
         print("=" * 40)
         print("        SALES ANALYTICS SYSTEM")
         print("=" * 40)
 
+        fetch_messages = []
+        fetch_started = time.perf_counter()
+        # Network waits release the GIL, so the fetch overlaps ingest and
+        # analysis; a daemon thread never holds up exit after a failed run
+        catalog_future = _start_thread(
+            fetch_all_products,
+            daemon=True,
+            url=args.api_url,
+            cache_path=args.catalog_cache or None,
+            ttl=args.catalog_ttl,
+            max_workers=args.api_workers,
+            latency_log=profiler.latency_log,
+            log=_collect(fetch_messages),
+            cancel=cancel_fetch
+        )
+
         # -------------------------------------------------
         # 1. Read sales data
         # -------------------------------------------------
         print("\n[1/10] Reading sales data...")
-        raw_lines = read_sales_data("data/sales_data.txt")
-        print(f"✓ Successfully read {len(raw_lines)} transactions")
+        if args.partitions:
+            # Only partitions overlapping the requested window are opened
+            raw_lines = None
+            print(f"✓ Reading partitions from {args.partitions}")
+        elif args.workers > 1:
+            # Byte ranges are read inside the worker processes
+            raw_lines = None
+            print(f"✓ Sharding {args.data_file} across {args.workers} workers")
+        elif args.mmap:
+            # Blocks of the mapped file are split into lines for the same parser
+            raw_lines = iter_sales_data_mmap(args.data_file)
+            print(f"✓ Memory-mapped {args.data_file}")
+        else:
+            # Lines are streamed lazily and consumed directly by the parser
+            raw_lines = iter_sales_data(args.data_file)
+            print(f"✓ Streaming transactions from {args.data_file}")
 
         # -------------------------------------------------
         # 2. Parse and clean
         # -------------------------------------------------
         print("\n[2/10] Parsing and cleaning data...")
-        transactions = parse_transactions(raw_lines)
-        print(f"✓ Parsed {len(transactions)} records")
+        # Streamed lines are read as they are parsed, so this includes file I/O
+        deduplicator = None
+        if args.dedup:
+            deduplicator = make_deduplicator(
+                args.dedup,
+                capacity=args.dedup_capacity,
+                error_rate=args.dedup_error_rate,
+                max_bytes=int(args.dedup_max_mb * 2**20) if args.dedup_max_mb else None
+            )
+
+        with profiler.stage('parse') as stage:
+            parse_report = None
+            if args.partitions:
+                # Partitions hold rows that were validated at ingest
+                transactions, prune_stats = read_partitions(
+                    args.partitions, args.start_date, args.end_date, args.region
+                )
+                print(f"✓ Read {prune_stats['partitions_read']}/{prune_stats['partitions_total']} "
+                      f"partitions ({prune_stats['bytes_read']:,}/{prune_stats['bytes_total']:,} bytes)")
+                if deduplicator is not None:
+                    transactions = drop_duplicates(transactions, deduplicator)
+                valid_transactions = transactions
+                parse_report = {
+                    'parsed': len(transactions),
+                    'valid': len(transactions),
+                    'rejected': {}
+                }
+            elif args.workers > 1:
+                # Workers validate their own ranges and return compact tables,
+                # which step 5 aggregates without building dictionaries
+                valid_transactions, parse_report = parse_and_validate_parallel(
+                    args.data_file, workers=args.workers
+                )
+                if deduplicator is not None:
+                    # First occurrence in file order wins, so this stays serial
+                    valid_transactions = drop_duplicates(valid_transactions, deduplicator)
+                    parse_report['valid'] = len(valid_transactions)
+                    parse_report['rejected']['duplicate'] = deduplicator.stats()['duplicates']
+                transactions = valid_transactions
+            else:
+                # Business rules are applied while parsing, in the same pass
+                valid_transactions, parse_report = parse_and_validate(
+                    raw_lines, deduplicator=deduplicator
+                )
+                transactions = valid_transactions
+            stage['rows'] = len(transactions)
+
+        if parse_report:
+            print(f"✓ Parsed {parse_report['parsed']} records")
+        else:
+            print(f"✓ Parsed {len(transactions)} records")
 
         # -------------------------------------------------
-        # 3. Display filter options
+        # 3. Validate and index
         # -------------------------------------------------
-        print("\n[3/10] Filter Options Available:")
+        print("\n[3/10] Validating transactions...")
+        if parse_report:
+            invalid_count = parse_report['parsed'] - parse_report['valid']
+            summary = {
+                'total_input': parse_report['parsed'],
+                'invalid': invalid_count,
+                'filtered_by_region': 0,
+                'filtered_by_amount': 0,
+                'final_count': parse_report['valid']
+            }
+            rejected = ", ".join(
+                f"{rule}={count}" for rule, count in parse_report['rejected'].items() if count
+            )
+            print("Rejected by rule:", rejected or "none")
+        else:
+            with profiler.stage('validate', rows=len(transactions)):
+                valid_transactions, invalid_count, summary = validate_and_filter(transactions)
 
-        regions = sorted(set(tx['Region'] for tx in transactions))
-        amounts = [tx['Quantity'] * tx['UnitPrice'] for tx in transactions]
+            if deduplicator is not None:
+                with profiler.stage('dedup', rows=len(valid_transactions)):
+                    valid_transactions = drop_duplicates(valid_transactions, deduplicator)
+                summary['final_count'] = len(valid_transactions)
 
+        if deduplicator is not None:
+            dedup_stats = deduplicator.stats()
+            print(f"Duplicate TransactionIDs dropped: {dedup_stats['duplicates']} ({args.dedup})")
+            if args.dedup == 'bloom':
+                print(f"Bloom filter: {dedup_stats['memory_bytes'] / 2**20:.1f} MB, "
+                      f"expected false-positive rate {dedup_stats['current_error_rate']:.2e}")
+
+        print(f"✓ Valid: {summary['final_count']} | Invalid: {invalid_count}")
+
+        # -------------------------------------------------
+        # 4. Display filter options and filter
+        # -------------------------------------------------
+        print("\n[4/10] Filter Options Available:")
+
+        regions, amount_range, date_range = filter_options(valid_transactions)
         print("Regions:", ", ".join(regions))
-        print(f"Amount Range: ₹{min(amounts):,.0f} - ₹{max(amounts):,.0f}")
+        if amount_range:
+            low, high = amount_range
+            print(f"Amount Range: ₹{low:,.0f} - ₹{high:,.0f}")
+        if date_range:
+            first_date, last_date = date_range
+            print(f"Date Range: {first_date} to {last_date}")
 
         apply_filter = input("\nDo you want to filter data? (y/n): ").strip().lower()
 
-        region_filter = None
-        min_amt = None
-        max_amt = None
+        # Every validated row, kept so the cube never holds a filtered subset
+        all_transactions = valid_transactions
+        index = None
+
+        while apply_filter == 'y':
+            if index is None:
+                # Built once, on first use, so every filter combination below
+                # avoids a full rescan
+                with profiler.stage('index', rows=len(all_transactions)):
+                    index = TransactionIndex(
+                        all_transactions,
+                        total_input=summary['total_input'],
+                        invalid=invalid_count
+                    )
 
-        if apply_filter == 'y':
             region_filter = input("Enter region (or press Enter to skip): ").strip()
             if not region_filter:
                 region_filter = None
 
             min_val = input("Enter minimum amount (or press Enter to skip): ").strip()
             max_val = input("Enter maximum amount (or press Enter to skip): ").strip()
+            start_val = input("Enter start date YYYY-MM-DD (or press Enter to skip): ").strip()
+            end_val = input("Enter end date YYYY-MM-DD (or press Enter to skip): ").strip()
 
-            min_amt = float(min_val) if min_val else None
-            max_amt = float(max_val) if max_val else None
+            try:
+                valid_transactions, summary = index.query(
+                    region=region_filter,
+                    min_amount=float(min_val) if min_val else None,
+                    max_amount=float(max_val) if max_val else None,
+                    start_date=start_val or None,
+                    end_date=end_val or None
+                )
+                print(f"Records matching filters: {summary['final_count']}")
+            except ValueError as e:
+                print("Invalid filter:", e)
 
-        # -------------------------------------------------
-        # 4. Validate and filter
-        # -------------------------------------------------
-        print("\n[4/10] Validating transactions...")
-        valid_transactions, invalid_count, summary = validate_and_filter(
-            transactions,
-            region=region_filter,
-            min_amount=min_amt,
-            max_amount=max_amt
-        )
+            apply_filter = input("\nTry a different filter combination? (y/n): ").strip().lower()
 
-        print(f"✓ Valid: {summary['final_count']} | Invalid: {invalid_count}")
+        print(f"✓ Selected {summary['final_count']} transactions")
 
         # -------------------------------------------------
         # 5. Analysis
         # -------------------------------------------------
         print("\n[5/10] Analyzing sales data...")
-        total_revenue = calculate_total_revenue(valid_transactions)
-        region_stats = region_wise_sales(valid_transactions)
-        top_products = top_selling_products(valid_transactions)
-        customers = customer_analysis(valid_transactions)
-        daily_trend = daily_sales_trend(valid_transactions)
-        peak_day = find_peak_sales_day(valid_transactions)
-        low_products = low_performing_products(valid_transactions)
+        # One scan feeds every analytic below
+        with profiler.stage('aggregate', rows=len(valid_transactions)):
+            sales_aggregate = aggregate_sales(
+                valid_transactions, distinct=args.distinct, precision=args.hll_precision
+            )
+        with profiler.stage('analytics'):
+            total_revenue = calculate_total_revenue(sales_aggregate)
+            region_stats = region_wise_sales(sales_aggregate)
+            if args.top_k == 'sketch':
+                # Fixed-memory estimates, rendered with their error bounds
+                top_products = heavy_hitter_products(valid_transactions)
+                top_customers = heavy_hitter_customers(valid_transactions)
+            else:
+                top_products = top_selling_products(sales_aggregate)
+                top_customers = None
+            customers = customer_analysis(sales_aggregate)
+            daily_trend = daily_sales_trend(sales_aggregate)
+            peak_day = find_peak_sales_day(sales_aggregate)
+            low_products = low_performing_products(sales_aggregate)
+        if args.save_cube:
+            # Built from every validated row, so an interactive filter never
+            # leaves a partial cube behind for the report command
+            with profiler.stage('cube', rows=len(all_transactions)):
+                save_cube(build_cube(all_transactions, args.cube_segment), args.cube)
+            print(f"✓ Rollup cube saved to: {args.cube}")
         print("✓ Analysis complete")
 
         # -------------------------------------------------
         # 6. Fetch API data
         # -------------------------------------------------
         print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
+        # Only the time still spent waiting here is on the critical path
+        with profiler.stage('fetch_wait') as stage:
+            api_products = catalog_future.result()
+            stage['rows'] = len(api_products)
+            stage['fetch_seconds'] = round(time.perf_counter() - fetch_started, 6)
+        for message in fetch_messages:
+            print(message)
         print(f"✓ Fetched {len(api_products)} products")
 
         # -------------------------------------------------
         # 7. Enrich data
         # -------------------------------------------------
         print("\n[7/10] Enriching sales data...")
-        product_mapping = create_product_mapping(api_products)
-        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
+        with profiler.stage('enrich', rows=len(valid_transactions)):
+            product_mapping = create_product_mapping(api_products)
+            enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
+            enrichment_summary = summarize_enrichment(enriched_transactions)
 
-        enriched_count = sum(1 for tx in enriched_transactions if tx.get('API_Match'))
-        success_rate = (enriched_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
+        enriched_count = enrichment_summary['enriched']
+        enriched_total = enrichment_summary['total']
+        success_rate = (enriched_count / enriched_total) * 100 if enriched_total else 0
 
-        print(f"✓ Enriched {enriched_count}/{len(enriched_transactions)} transactions ({success_rate:.1f}%)")
+        print(f"✓ Enriched {enriched_count}/{enriched_total} transactions ({success_rate:.1f}%)")
 
         # -------------------------------------------------
-        # 8. Saving already handled in enrichment
+        # 8. Save enriched data
         # -------------------------------------------------
         print("\n[8/10] Saving enriched data...")
-        print("✓ Saved to: data/enriched_sales_data.txt")
+        if args.enriched_format == 'columnar':
+            enriched_file = 'data/enriched_sales_data.col'
+        else:
+            enriched_file = 'data/enriched_sales_data.txt'
+        # Written in the background and joined once the report is rendered;
+        # not a daemon, so an error exit still finishes the write
+        save_messages = []
+        save_future = _start_thread(
+            save_enriched_data, enriched_transactions, enriched_file,
+            file_format=args.enriched_format, log=_collect(save_messages)
+        )
 
         # -------------------------------------------------
         # 9. Generate report
         # -------------------------------------------------
         print("\n[9/10] Generating report...")
-        generate_sales_report(valid_transactions, enriched_transactions)
+        with profiler.stage('report'):
+            generate_sales_report(
+                valid_transactions,
+                enriched_transactions,
+                aggregate=sales_aggregate,
+                enrichment_summary=enrichment_summary,
+                heavy_hitters=(top_products, top_customers) if args.top_k == 'sketch' else None
+            )
+        with profiler.stage('save_wait', rows=len(enriched_transactions)):
+            save_future.result()
+        for message in save_messages:
+            print(message)
+        print(f"✓ Saved to: {enriched_file}")
         print("✓ Report saved to: output/sales_report.txt")
 
         # -------------------------------------------------
@@ -139,6 +767,69 @@ def main():
         print("Error details:", e)
         print("Please check your input files or configuration.")
 
+    finally:
+        cancel_fetch.set()
+
+def _unsupported_options(args):
+    # Modes that only see aggregates cannot honour options that need the rows
+    row_modes = args.command in ('run', 'serve') and not (args.incremental or args.follow)
+
+    if args.top_k == 'sketch' and not row_modes:
+        return "--top-k sketch needs the transaction rows; use it with run or serve"
+
+    # Checkpointed and merged modes would need the seen IDs persisted with
+    # their state, so rather than silently keeping duplicates they refuse
+    if args.dedup and args.command != 'ingest' and not (args.command == 'run' and row_modes):
+        return "--dedup is only supported by run and ingest, without --incremental or --follow"
+
+    # A pruned read covers only part of the store, and the cube would replace
+    # the full one with that window
+    windowed = args.start_date or args.end_date or args.region
+    if args.save_cube and args.partitions and windowed:
+        return "--save-cube cannot be combined with --start-date, --end-date or --region"
+
+    return None
+
+def main(argv=None):
+    """
+    Main execution function for Sales Analytics System
+    """
+
+    args = parse_args(argv)
+
+    problem = _unsupported_options(args)
+    if problem:
+        print("Error:", problem)
+        return
+
+    if args.command == 'serve':
+        serve(args.data_file, host=args.host, port=args.port,
+              reload_interval=args.reload_interval, top_k=args.top_k)
+        return
+
+    profiler = RunProfiler(trace_memory=args.profile_memory, cprofile_dir=args.cprofile_dir)
+
+    if args.command == 'report':
+        run_cube_report(args, profiler)
+    elif args.command == 'ingest':
+        run_ingest(args, profiler)
+    elif args.command == 'map':
+        run_map(args, profiler)
+    elif args.command == 'reduce':
+        run_reduce(args, profiler)
+    elif args.follow:
+        run_follow(args, profiler)
+    elif args.incremental:
+        run_incremental(args, profiler)
+    else:
+        run_pipeline(args, profiler)
+
+    if args.profile:
+        profiler.save(args.profile)
+        print(f"\nRun profile saved to: {args.profile}")
+        profiler.print_summary()
+    profiler.stop()
+
 
 if __name__ == "__main__":
     main()
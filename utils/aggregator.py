@@ -0,0 +1,320 @@
+from utils.money import to_paise
+from utils.sketches import HyperLogLog
+
+def _dump_distinct(values):
+    if isinstance(values, HyperLogLog):
+        return values.to_dict()
+    return sorted(values)
+
+def _load_distinct(state):
+    if isinstance(state, dict):
+        return HyperLogLog.from_dict(state)
+    return set(state)
+
+class SalesAggregate:
+    """
+    Running totals for every analytic in data_processor, built in one scan
+    Each transaction's amount is computed once and folded into the region,
+    product, customer and daily groups at the same time.
+
+    Money is accumulated in integer paise (total_revenue, total_sales,
+    total_spent and revenue), so totals are exact and identical whatever
+    the order rows are summed or partial aggregates merged in. The
+    analytics functions convert back to rupees.
+
+    With distinct='hll' the per-day customer and per-customer product sets
+    are replaced by HyperLogLog sketches of the given precision, trading
+    exact distinct counts for fixed memory per group.
+    """
+
+    def __init__(self, distinct='exact', precision=12):
+        if distinct not in ('exact', 'hll'):
+            raise ValueError(f"Unknown distinct mode: {distinct}")
+
+        self.distinct = distinct
+        self.precision = precision
+        self.transaction_count = 0
+        self.total_revenue = 0
+        self.regions = {}
+        self.products = {}
+        self.customers = {}
+        self.daily = {}
+
+    def _new_distinct(self):
+        if self.distinct == 'hll':
+            return HyperLogLog(self.precision)
+        return set()
+
+    def update(self, transactions):
+        """
+        Folds an iterable of transaction dictionaries into the aggregate
+        Returns: self, so calls can be chained
+        """
+
+        regions = self.regions
+        products = self.products
+        customers = self.customers
+        daily = self.daily
+
+        count = 0
+        total = 0
+
+        for tx in transactions:
+            qty = tx['Quantity']
+            # UnitPrice is a float in rupees; rounding recovers its exact paise
+            amount = qty * to_paise(tx['UnitPrice'])
+            count += 1
+            total += amount
+
+            region = tx['Region']
+            region_entry = regions.get(region)
+            if region_entry is None:
+                region_entry = regions[region] = {
+                    'total_sales': 0,
+                    'transaction_count': 0
+                }
+            region_entry['total_sales'] += amount
+            region_entry['transaction_count'] += 1
+
+            product = tx['ProductName']
+            product_entry = products.get(product)
+            if product_entry is None:
+                product_entry = products[product] = {
+                    'total_quantity': 0,
+                    'total_revenue': 0
+                }
+            product_entry['total_quantity'] += qty
+            product_entry['total_revenue'] += amount
+
+            customer = tx['CustomerID']
+            customer_entry = customers.get(customer)
+            if customer_entry is None:
+                customer_entry = customers[customer] = {
+                    'total_spent': 0,
+                    'purchase_count': 0,
+                    'products_bought': self._new_distinct()
+                }
+            customer_entry['total_spent'] += amount
+            customer_entry['purchase_count'] += 1
+            customer_entry['products_bought'].add(product)
+
+            date = tx['Date']
+            day_entry = daily.get(date)
+            if day_entry is None:
+                day_entry = daily[date] = {
+                    'revenue': 0,
+                    'transaction_count': 0,
+                    'customers': self._new_distinct()
+                }
+            day_entry['revenue'] += amount
+            day_entry['transaction_count'] += 1
+            day_entry['customers'].add(customer)
+
+        self.transaction_count += count
+        self.total_revenue += total
+
+        return self
+
+    def update_table(self, table):
+        """
+        Folds a columnar TransactionTable into the aggregate
+        Groups are accumulated in code-indexed lists over the table's typed
+        columns, so no per-row dictionaries or string hashing are involved.
+        Returns: self, so calls can be chained
+        """
+
+        region_values = table.column_values('Region')
+        product_values = table.column_values('ProductName')
+        customer_values = table.column_values('CustomerID')
+
+        region_sales = [0] * len(region_values)
+        region_counts = [0] * len(region_values)
+        product_quantities = [0] * len(product_values)
+        product_revenues = [0] * len(product_values)
+        customer_spent = [0] * len(customer_values)
+        customer_counts = [0] * len(customer_values)
+        # Exact code sets are folded into the configured distinct type below
+        customer_products = [set() for _ in customer_values]
+        daily = {}
+
+        total = 0
+
+        columns = zip(
+            table.quantities,
+            table.unit_paise,
+            table.codes['Region'],
+            table.codes['ProductName'],
+            table.codes['CustomerID'],
+            table.dates
+        )
+
+        for qty, price, region, product, customer, ordinal in columns:
+            amount = qty * price
+            total += amount
+
+            region_sales[region] += amount
+            region_counts[region] += 1
+
+            product_quantities[product] += qty
+            product_revenues[product] += amount
+
+            customer_spent[customer] += amount
+            customer_counts[customer] += 1
+            customer_products[customer].add(product)
+
+            day = daily.get(ordinal)
+            if day is None:
+                day = daily[ordinal] = [0, 0, set()]
+            day[0] += amount
+            day[1] += 1
+            day[2].add(customer)
+
+        self.transaction_count += len(table)
+        self.total_revenue += total
+
+        # Decode the code-indexed accumulators into the named groups
+        for code, region in enumerate(region_values):
+            entry = self.regions.setdefault(region, {
+                'total_sales': 0,
+                'transaction_count': 0
+            })
+            entry['total_sales'] += region_sales[code]
+            entry['transaction_count'] += region_counts[code]
+
+        for code, product in enumerate(product_values):
+            entry = self.products.setdefault(product, {
+                'total_quantity': 0,
+                'total_revenue': 0
+            })
+            entry['total_quantity'] += product_quantities[code]
+            entry['total_revenue'] += product_revenues[code]
+
+        for code, customer in enumerate(customer_values):
+            entry = self.customers.setdefault(customer, {
+                'total_spent': 0,
+                'purchase_count': 0,
+                'products_bought': self._new_distinct()
+            })
+            entry['total_spent'] += customer_spent[code]
+            entry['purchase_count'] += customer_counts[code]
+            entry['products_bought'].update(product_values[p] for p in customer_products[code])
+
+        for ordinal, (revenue, count, customers) in daily.items():
+            entry = self.daily.setdefault(table.date_string(ordinal), {
+                'revenue': 0,
+                'transaction_count': 0,
+                'customers': self._new_distinct()
+            })
+            entry['revenue'] += revenue
+            entry['transaction_count'] += count
+            entry['customers'].update(customer_values[c] for c in customers)
+
+        return self
+
+    def merge(self, other):
+        """
+        Folds another SalesAggregate into this one
+        Merging is associative and commutative, so partial aggregates can
+        be combined in any order or grouping.
+        Returns: self, so calls can be chained
+        """
+
+        if other.distinct != self.distinct or (
+            self.distinct == 'hll' and other.precision != self.precision
+        ):
+            raise ValueError("Cannot merge aggregates with different distinct-count settings")
+
+        self.transaction_count += other.transaction_count
+        self.total_revenue += other.total_revenue
+
+        for region, data in other.regions.items():
+            entry = self.regions.setdefault(region, {
+                'total_sales': 0,
+                'transaction_count': 0
+            })
+            entry['total_sales'] += data['total_sales']
+            entry['transaction_count'] += data['transaction_count']
+
+        for product, data in other.products.items():
+            entry = self.products.setdefault(product, {
+                'total_quantity': 0,
+                'total_revenue': 0
+            })
+            entry['total_quantity'] += data['total_quantity']
+            entry['total_revenue'] += data['total_revenue']
+
+        for customer, data in other.customers.items():
+            entry = self.customers.setdefault(customer, {
+                'total_spent': 0,
+                'purchase_count': 0,
+                'products_bought': self._new_distinct()
+            })
+            entry['total_spent'] += data['total_spent']
+            entry['purchase_count'] += data['purchase_count']
+            entry['products_bought'] |= data['products_bought']
+
+        for date, data in other.daily.items():
+            entry = self.daily.setdefault(date, {
+                'revenue': 0,
+                'transaction_count': 0,
+                'customers': self._new_distinct()
+            })
+            entry['revenue'] += data['revenue']
+            entry['transaction_count'] += data['transaction_count']
+            entry['customers'] |= data['customers']
+
+        return self
+
+    def to_dict(self):
+        """
+        Converts the aggregate into JSON-serialisable form
+        Returns: dictionary understood by SalesAggregate.from_dict
+        """
+
+        return {
+            'money': 'paise',
+            'distinct': self.distinct,
+            'precision': self.precision,
+            'transaction_count': self.transaction_count,
+            'total_revenue': self.total_revenue,
+            'regions': self.regions,
+            'products': self.products,
+            'customers': {
+                customer: {**data, 'products_bought': _dump_distinct(data['products_bought'])}
+                for customer, data in self.customers.items()
+            },
+            'daily': {
+                date: {**data, 'customers': _dump_distinct(data['customers'])}
+                for date, data in self.daily.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuilds an aggregate from the output of to_dict
+        Returns: SalesAggregate
+        """
+
+        if state.get('money') != 'paise':
+            raise ValueError("Aggregate state predates integer paise totals")
+
+        aggregate = cls(state.get('distinct', 'exact'), state.get('precision', 12))
+        aggregate.transaction_count = state['transaction_count']
+        aggregate.total_revenue = state['total_revenue']
+        aggregate.regions = {
+            region: dict(data) for region, data in state['regions'].items()
+        }
+        aggregate.products = {
+            product: dict(data) for product, data in state['products'].items()
+        }
+        aggregate.customers = {
+            customer: {**data, 'products_bought': _load_distinct(data['products_bought'])}
+            for customer, data in state['customers'].items()
+        }
+        aggregate.daily = {
+            date: {**data, 'customers': _load_distinct(data['customers'])}
+            for date, data in state['daily'].items()
+        }
+
+        return aggregate
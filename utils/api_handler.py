@@ -1,5 +1,32 @@
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
 import requests
 
+from utils.columnar_io import save_enriched_columnar
+from utils.catalog_cache import (
+    load_catalog_cache,
+    save_catalog_cache,
+    cache_is_fresh,
+    cached_products,
+    revalidation_headers
+)
+
+PRODUCTS_URL = "https://dummyjson.com/products"
+
+# Transient statuses worth retrying before giving up on a page
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Shared by every transaction whose product is missing from the catalog
+UNMATCHED_FIELDS = MappingProxyType({
+    'API_Category': None,
+    'API_Brand': None,
+    'API_Rating': None,
+    'API_Match': False
+})
+
 def fetch_product_details(product_id):
     mock_api_data = {
         "P101": {"Category": "Electronics", "Rating": 4.5},
@@ -9,39 +36,190 @@ def fetch_product_details(product_id):
 
     return mock_api_data.get(product_id, {"Category": "Unknown", "Rating": "N/A"})
 
-def fetch_all_products():
+def _product_fields(item):
+    return {
+        'id': item.get('id'),
+        'title': item.get('title'),
+        'category': item.get('category'),
+        'brand': item.get('brand'),
+        'price': item.get('price'),
+        'rating': item.get('rating')
+    }
+
+class _NotModified(Exception):
+    pass
+
+class _Cancelled(Exception):
+    pass
 
+def _make_session(pool_size):
+    # One pooled connection per worker so pages reuse keep-alive sockets
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
+def _fetch_page(session, url, skip, limit, timeout, retries, backoff,
+                headers=None, latency_log=None, cancel=None):
+    """
+    Fetches one catalog page, retrying transient failures with backoff
+    A set cancel event stops before the next attempt or during backoff.
+    Returns: (decoded JSON body, response)
+    """
+
+    params = {'limit': limit, 'skip': skip}
+    attempt = 0
+    start = time.perf_counter()
+
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise _Cancelled()
+
+        attempt += 1
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+            if response.status_code == 304:
+                break
+            if response.status_code in RETRY_STATUSES and attempt <= retries:
+                raise requests.exceptions.HTTPError(f"{response.status_code} for skip={skip}")
+            response.raise_for_status()
+            data = response.json()
+            break
+        except requests.exceptions.RequestException as e:
+            if attempt > retries:
+                if latency_log is not None:
+                    latency_log.append({
+                        'skip': skip,
+                        'status': None,
+                        'attempts': attempt,
+                        'seconds': round(time.perf_counter() - start, 4),
+                        'error': str(e)
+                    })
+                raise
+            delay = backoff * (2 ** (attempt - 1))
+            if cancel is None:
+                time.sleep(delay)
+            elif cancel.wait(delay):
+                raise _Cancelled()
+
+    if latency_log is not None:
+        latency_log.append({
+            'skip': skip,
+            'status': response.status_code,
+            'attempts': attempt,
+            'seconds': round(time.perf_counter() - start, 4)
+        })
+
+    if response.status_code == 304:
+        raise _NotModified()
+
+    return data, response
+
+def fetch_all_products(url=PRODUCTS_URL, cache_path=None, ttl=86400, timeout=10,
+                       page_size=100, max_workers=8, retries=3, backoff=0.5,
+                       latency_log=None, log=print, cancel=None):
     """
     Fetches all products from DummyJSON API
 
+    The first page reports the catalog total; the remaining skip/limit
+    pages are then fetched concurrently on at most max_workers threads
+    sharing one pooled requests.Session. Each page is retried up to
+    retries times with exponential backoff, and its latency is appended
+    to latency_log when a list is given.
+
+    With a cache_path the catalog is served from disk while younger than
+    ttl seconds. Older entries are revalidated with ETag/If-Modified-Since
+    on the first page, and a stale cache is returned if the API cannot be
+    reached.
+
+    Status messages go to log, so a caller running the fetch on a
+    background thread can collect them instead of interleaving output.
+    Setting the cancel event (a threading.Event) abandons the fetch before
+    the next request attempt; requests already in flight still finish or
+    time out.
+
     Returns: list of product dictionaries
     """
 
-    url = "https://dummyjson.com/products?limit=100"
+    cache = load_catalog_cache(cache_path, log=log) if cache_path else None
+
+    if cache_is_fresh(cache, url, ttl):
+        products = cached_products(cache)
+        log(f"Loaded {len(products)} products from catalog cache.")
+        return products
+
+    if latency_log is None:
+        latency_log = []
+
+    started = time.perf_counter()
 
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # raises error for 4xx/5xx
+        with _make_session(max_workers) as session:
+            try:
+                first_page, response = _fetch_page(
+                    session, url, 0, page_size, timeout, retries, backoff,
+                    headers=revalidation_headers(cache, url),
+                    latency_log=latency_log,
+                    cancel=cancel
+                )
+            except _NotModified:
+                # Catalog unchanged: refresh the cache age without a new body
+                products = cached_products(cache)
+                save_catalog_cache(
+                    cache_path, products, url,
+                    etag=cache.get('etag'),
+                    last_modified=cache.get('last_modified')
+                )
+                log(f"Catalog not modified, reusing {len(products)} cached products.")
+                return products
+
+            pages = [first_page]
+            total = first_page.get('total', len(first_page.get('products', [])))
+            # Servers may cap the page size below what was asked for
+            step = first_page.get('limit') or page_size
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        _fetch_page, session, url, skip, step, timeout,
+                        retries, backoff, None, latency_log, cancel
+                    )
+                    for skip in range(step, total, step)
+                ]
+                pages.extend(future.result()[0] for future in futures)
 
-        data = response.json()
         products = []
 
-        for item in data.get('products', []):
-            products.append({
-                'id': item.get('id'),
-                'title': item.get('title'),
-                'category': item.get('category'),
-                'brand': item.get('brand'),
-                'price': item.get('price'),
-                'rating': item.get('rating')
-            })
-
-        print(f"Successfully fetched {len(products)} products from API.")
+        for page in pages:
+            for item in page.get('products', []):
+                products.append(_product_fields(item))
+
+        if cache_path:
+            save_catalog_cache(
+                cache_path, products, url,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+
+        elapsed = time.perf_counter() - started
+        slowest = max(entry['seconds'] for entry in latency_log)
+        log(f"Successfully fetched {len(products)} products from API "
+              f"({len(pages)} pages in {elapsed:.2f}s, slowest page {slowest:.2f}s).")
         return products
 
-    except requests.exceptions.RequestException as e:
-        print("Failed to fetch products from API:", e)
+    except _Cancelled:
+        log("Catalog fetch cancelled.")
+        return []
+
+    except (requests.exceptions.RequestException, ValueError) as e:
+        log("Failed to fetch products from API:", e)
+
+        if cache is not None and cache.get('url') == url:
+            products = cached_products(cache)
+            log(f"Using {len(products)} products from stale catalog cache.")
+            return products
+
         return []
 
 def create_product_mapping(api_products):
@@ -72,82 +250,152 @@ def create_product_mapping(api_products):
 
     return product_mapping
 
-def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
+ENRICHED_HEADER = [
+    'TransactionID', 'Date', 'ProductID', 'ProductName',
+    'Quantity', 'UnitPrice', 'CustomerID', 'Region',
+    'API_Category', 'API_Brand', 'API_Rating', 'API_Match'
+]
+
+def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt',
+                       file_format='text', batch_size=10000, log=print):
     """
     Saves enriched transactions back to file using pipe delimiter
+    Rows are serialised and written in batches of batch_size lines.
+    file_format='columnar' writes the typed binary layout from
+    utils.columnar_io instead, which can be memory-mapped back in.
+    Status messages go to log, as in fetch_all_products.
     """
 
-    header = [
-        'TransactionID', 'Date', 'ProductID', 'ProductName',
-        'Quantity', 'UnitPrice', 'CustomerID', 'Region',
-        'API_Category', 'API_Brand', 'API_Rating', 'API_Match'
-    ]
-
     try:
+        if file_format == 'columnar':
+            save_enriched_columnar(enriched_transactions, filename)
+            log(f"Enriched sales data saved to {filename}")
+            return
+
         with open(filename, 'w', encoding='utf-8') as file:
-            file.write('|'.join(header) + '\n')
+            file.write('|'.join(ENRICHED_HEADER) + '\n')
 
+            batch = []
             for tx in enriched_transactions:
-                row = [
-                    str(tx.get('TransactionID', '')),
-                    str(tx.get('Date', '')),
-                    str(tx.get('ProductID', '')),
-                    str(tx.get('ProductName', '')),
-                    str(tx.get('Quantity', '')),
-                    str(tx.get('UnitPrice', '')),
-                    str(tx.get('CustomerID', '')),
-                    str(tx.get('Region', '')),
-                    str(tx.get('API_Category', '')),
-                    str(tx.get('API_Brand', '')),
-                    str(tx.get('API_Rating', '')),
-                    str(tx.get('API_Match', ''))
-                ]
+                batch.append('|'.join([str(tx.get(field, '')) for field in ENRICHED_HEADER]))
 
-                file.write('|'.join(row) + '\n')
+                if len(batch) >= batch_size:
+                    batch.append('')
+                    file.write('\n'.join(batch))
+                    batch = []
 
-        print(f"Enriched sales data saved to {filename}")
+            if batch:
+                batch.append('')
+                file.write('\n'.join(batch))
+
+        log(f"Enriched sales data saved to {filename}")
 
     except Exception as e:
-        print("Error saving enriched data:", e)
+        log("Error saving enriched data:", e)
+
+def summarize_enrichment(enriched_transactions):
+    """
+    Summarizes how many transactions were matched against the API catalog
+    Returns: dictionary with total, enriched and failed_products (set of names)
+    """
+
+    enriched = 0
+    failed_products = set()
+
+    for tx in enriched_transactions:
+        if tx.get('API_Match'):
+            enriched += 1
+        else:
+            failed_products.add(tx['ProductName'])
+
+    return {
+        'total': len(enriched_transactions),
+        'enriched': enriched,
+        'failed_products': failed_products
+    }
+
+class EnrichedTransaction(Mapping):
+    """
+    Read-only view layering shared API_* fields over a base transaction
+    Neither the base row nor the API fields are copied.
+    """
+
+    __slots__ = ('_api_fields', '_transaction')
+
+    def __init__(self, api_fields, transaction):
+        self._api_fields = api_fields
+        self._transaction = transaction
+
+    def __getitem__(self, key):
+        api_fields = self._api_fields
+        if key in api_fields:
+            return api_fields[key]
+        return self._transaction[key]
+
+    def get(self, key, default=None):
+        # Overridden so lookups avoid Mapping.get's KeyError round-trip
+        api_fields = self._api_fields
+        if key in api_fields:
+            return api_fields[key]
+        return self._transaction.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._api_fields or key in self._transaction
+
+    def __iter__(self):
+        yield from self._transaction
+        for key in self._api_fields:
+            if key not in self._transaction:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+def _resolve_product(product_id, product_mapping):
+    """
+    Looks up the API fields for one ProductID (P101 -> 101)
+    Returns: read-only mapping of API_* fields
+    """
+
+    try:
+        numeric_id = int(product_id.replace('P', ''))
+    except (AttributeError, ValueError):
+        return UNMATCHED_FIELDS
+
+    api_product = product_mapping.get(numeric_id)
+
+    if not api_product:
+        return UNMATCHED_FIELDS
+
+    return MappingProxyType({
+        'API_Category': api_product.get('category'),
+        'API_Brand': api_product.get('brand'),
+        'API_Rating': api_product.get('rating'),
+        'API_Match': True
+    })
 
 def enrich_sales_data(transactions, product_mapping):
     """
     Enriches transaction data with API product information
-    Returns: list of enriched transaction dictionaries
+
+    Each distinct ProductID is resolved against the catalog once. Every
+    enriched transaction is a lazy EnrichedTransaction view layering the shared API
+    fields over the original row, so base rows are never copied. Use
+    save_enriched_data to persist the result.
+
+    Returns: list of enriched transaction mappings
     """
 
+    resolved = {}
     enriched_transactions = []
 
     for tx in transactions:
-        enriched_tx = tx.copy()
+        product_id = tx.get('ProductID', '')
+        api_fields = resolved.get(product_id)
 
-        try:
-            # Extract numeric product ID (P101 -> 101)
-            product_id_str = tx.get('ProductID', '')
-            numeric_id = int(product_id_str.replace('P', ''))
-
-            api_product = product_mapping.get(numeric_id)
-
-            if api_product:
-                enriched_tx['API_Category'] = api_product.get('category')
-                enriched_tx['API_Brand'] = api_product.get('brand')
-                enriched_tx['API_Rating'] = api_product.get('rating')
-                enriched_tx['API_Match'] = True
-            else:
-                enriched_tx['API_Category'] = None
-                enriched_tx['API_Brand'] = None
-                enriched_tx['API_Rating'] = None
-                enriched_tx['API_Match'] = False
-
-        except Exception:
-            enriched_tx['API_Category'] = None
-            enriched_tx['API_Brand'] = None
-            enriched_tx['API_Rating'] = None
-            enriched_tx['API_Match'] = False
-
-        enriched_transactions.append(enriched_tx)
-
-    # Save to file
-    save_enriched_data(enriched_transactions)
+        if api_fields is None:
+            api_fields = resolved[product_id] = _resolve_product(product_id, product_mapping)
+
+        enriched_transactions.append(EnrichedTransaction(api_fields, tx))
 
     return enriched_transactions
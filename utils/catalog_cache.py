@@ -0,0 +1,79 @@
+import json
+import time
+
+from utils.file_handler import write_json_atomic
+
+def load_catalog_cache(cache_path, log=print):
+    """
+    Loads the on-disk product catalog cache
+    Problems are reported through log (print by default).
+    Returns: cache dictionary, or None when missing or unreadable
+    """
+
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            cache = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log("Ignoring unreadable catalog cache:", e)
+        return None
+
+    if not isinstance(cache.get('products'), dict):
+        return None
+
+    return cache
+
+def save_catalog_cache(cache_path, products, url, etag=None, last_modified=None, fetched_at=None):
+    """
+    Writes the product catalog cache keyed by product id
+    Validators from the response are kept for conditional revalidation.
+    Returns: the cache dictionary that was written
+    """
+
+    cache = {
+        'url': url,
+        'fetched_at': time.time() if fetched_at is None else fetched_at,
+        'etag': etag,
+        'last_modified': last_modified,
+        'products': {str(product['id']): product for product in products}
+    }
+
+    write_json_atomic(cache_path, cache)
+
+    return cache
+
+def cache_is_fresh(cache, url, ttl):
+    """
+    Checks whether a cache entry for url is younger than ttl seconds
+    """
+
+    if cache is None or cache.get('url') != url:
+        return False
+
+    return time.time() - cache.get('fetched_at', 0) < ttl
+
+def cached_products(cache):
+    """
+    Returns: list of cached product dictionaries ordered by product id
+    """
+
+    return sorted(cache['products'].values(), key=lambda product: product['id'])
+
+def revalidation_headers(cache, url):
+    """
+    Builds If-None-Match / If-Modified-Since headers from a cache entry
+    Returns: dictionary of HTTP headers (empty when nothing to revalidate)
+    """
+
+    headers = {}
+
+    if cache is None or cache.get('url') != url:
+        return headers
+
+    if cache.get('etag'):
+        headers['If-None-Match'] = cache['etag']
+    if cache.get('last_modified'):
+        headers['If-Modified-Since'] = cache['last_modified']
+
+    return headers
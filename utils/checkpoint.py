@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+
+from utils.aggregator import SalesAggregate
+from utils.data_processor import aggregate_sales, parse_transactions_table
+from utils.file_handler import detect_encoding, iter_byte_range, write_json_atomic, decode_block
+
+CHECKPOINT_VERSION = 2
+FINGERPRINT_BYTES = 4096
+
+def _hash_range(file, start, end):
+    file.seek(start)
+    return hashlib.sha1(file.read(end - start)).hexdigest()
+
+def file_fingerprint(filename, offset):
+    """
+    Fingerprints the already-processed prefix of a sales file
+    Hashes the first and last few KB before offset, which is enough to tell
+    an append from a rewrite without re-reading the whole prefix.
+    Returns: dictionary with offset, head and tail hashes
+    """
+
+    with open(filename, 'rb') as file:
+        return _fingerprint_file(file, offset)
+
+def _fingerprint_file(file, offset):
+    head_end = min(offset, FINGERPRINT_BYTES)
+    tail_start = max(offset - FINGERPRINT_BYTES, 0)
+
+    return {
+        'offset': offset,
+        'head': _hash_range(file, 0, head_end),
+        'tail': _hash_range(file, tail_start, offset)
+    }
+
+def load_checkpoint(checkpoint_path):
+    """
+    Loads a saved incremental checkpoint
+    Returns: checkpoint dictionary, or None when missing or unreadable
+    """
+
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as file:
+            checkpoint = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print("Ignoring unreadable checkpoint:", e)
+        return None
+
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        return None
+
+    return checkpoint
+
+def save_checkpoint(checkpoint_path, checkpoint):
+    """
+    Writes a checkpoint atomically so an interrupted run never corrupts it
+    """
+
+    write_json_atomic(checkpoint_path, checkpoint)
+
+def last_complete_line_end(filename, start):
+    """
+    Finds the end of the last newline-terminated line at or after start
+    Rows still being written (no trailing newline yet) wait for the next run.
+    Returns: byte offset, start when no complete line follows it
+    """
+
+    with open(filename, 'rb') as file:
+        end = file.seek(0, 2)
+        block = 65536
+
+        while end > start:
+            read_from = max(end - block, start)
+            file.seek(read_from)
+            chunk = file.read(end - read_from)
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                return read_from + newline + 1
+            end = read_from
+
+    return start
+
+def _checkpoint_is_current(checkpoint, filename, distinct, precision):
+    if checkpoint is None:
+        return False
+    if checkpoint['aggregate'].get('distinct', 'exact') != distinct:
+        return False
+    if distinct == 'hll' and checkpoint['aggregate'].get('precision') != precision:
+        return False
+    if checkpoint.get('source') != os.path.abspath(filename):
+        return False
+
+    offset = checkpoint['fingerprint']['offset']
+    if os.path.getsize(filename) < offset:
+        return False
+
+    return file_fingerprint(filename, offset) == checkpoint['fingerprint']
+
+def _resume(filename, checkpoint_path, distinct, precision):
+    # Starts from the checkpoint when it still matches the file, else from the header
+    checkpoint = load_checkpoint(checkpoint_path) if checkpoint_path else None
+
+    if _checkpoint_is_current(checkpoint, filename, distinct, precision):
+        return (
+            'incremental',
+            SalesAggregate.from_dict(checkpoint['aggregate']),
+            checkpoint['encoding'],
+            checkpoint['fingerprint']['offset']
+        )
+
+    encoding = detect_encoding(filename)
+    if encoding is None:
+        raise ValueError("Unable to read file with supported encodings.")
+
+    # Skip header
+    with open(filename, 'rb') as file:
+        file.readline()
+        start = file.tell()
+
+    return 'full', SalesAggregate(distinct, precision), encoding, start
+
+def _consume(filename, aggregate, start, end, encoding):
+    # Parses, validates and merges the complete lines in [start, end)
+    new_rows = parse_transactions_table(
+        iter_byte_range(filename, start, end, encoding),
+        validate=True
+    )
+    aggregate.merge(aggregate_sales(new_rows, aggregate.distinct, aggregate.precision))
+    return len(new_rows)
+
+def _save(checkpoint_path, filename, encoding, end, aggregate, fingerprint=None):
+    save_checkpoint(checkpoint_path, {
+        'version': CHECKPOINT_VERSION,
+        'source': os.path.abspath(filename),
+        'encoding': encoding,
+        'fingerprint': fingerprint or file_fingerprint(filename, end),
+        'aggregate': aggregate.to_dict()
+    })
+
+def update_incremental(filename, checkpoint_path, distinct='exact', precision=12):
+    """
+    Brings the checkpointed aggregate up to date with an append-only file
+    Only lines appended since the last run are parsed, validated and merged.
+    Falls back to a full rebuild when there is no checkpoint or the
+    processed prefix of the file has changed, or the distinct-count mode
+    differs from the one the checkpoint was built with.
+    Returns: (SalesAggregate, stats dictionary)
+    """
+
+    mode, aggregate, encoding, start = _resume(filename, checkpoint_path, distinct, precision)
+
+    end = last_complete_line_end(filename, start)
+    new_rows = _consume(filename, aggregate, start, end, encoding)
+
+    _save(checkpoint_path, filename, encoding, end, aggregate)
+
+    stats = {
+        'mode': mode,
+        'bytes_read': end - start,
+        'new_rows': new_rows,
+        'total_rows': aggregate.transaction_count
+    }
+
+    return aggregate, stats
+
+class SalesFollower:
+    """
+    Keeps a SalesAggregate up to date with a sales file that is still
+    being appended to
+
+    The file is read through an open handle, and each poll() only parses
+    complete lines written since the previous poll. When the name points
+    at a new inode (the file was rotated) the old handle is read to its
+    end first and the new file is then followed from its header, keeping
+    the totals. Only the same inode shrinking or changing its processed
+    prefix (rewritten in place) rebuilds the aggregate from the start.
+    save() writes the aggregate to the checkpoint so a later run (or
+    --incremental) resumes from there.
+    """
+
+    def __init__(self, filename, checkpoint_path=None, distinct='exact', precision=12):
+        self.filename = filename
+        self.checkpoint_path = checkpoint_path
+        self.distinct = distinct
+        self.precision = precision
+
+        self.mode, self.aggregate, self.encoding, self.offset = _resume(
+            filename, checkpoint_path, distinct, precision
+        )
+        self._file = open(filename, 'rb')
+        self._inode = self._file_inode()
+        self.fingerprint = _fingerprint_file(self._file, self.offset)
+        self.poll()
+
+    def _file_inode(self):
+        stat = os.fstat(self._file.fileno())
+        return stat.st_dev, stat.st_ino
+
+    def _restart(self):
+        # Starts over at the header of the file the handle now points at
+        self.encoding = detect_encoding(self.filename)
+        if self.encoding is None:
+            raise ValueError("Unable to read file with supported encodings.")
+
+        self._file.seek(0)
+        self._file.readline()
+        self.offset = self._file.tell()
+        self.fingerprint = _fingerprint_file(self._file, self.offset)
+
+    def _lines(self, final, chunk_size=1 << 20):
+        # Complete lines after offset in the open handle; a rotated-away
+        # file is final, so its unterminated last line is read as well
+        file = self._file
+        file.seek(self.offset)
+        pending = b''
+
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            block = pending + chunk
+            cut = block.rfind(b'\n') + 1
+            pending = block[cut:]
+            self._end += cut
+            for line in decode_block(block[:cut], self.encoding):
+                line = line.strip()
+                if line:
+                    yield line
+
+        if final and pending:
+            self._end += len(pending)
+            line = decode_block(pending, self.encoding)[0].strip()
+            if line:
+                yield line
+
+    def _drain(self, final=False):
+        # Folds every complete line after offset into the aggregate
+        self._end = self.offset
+        new_rows = parse_transactions_table(self._lines(final), validate=True)
+        if not new_rows and self._end == self.offset:
+            return 0
+
+        self.aggregate.merge(
+            aggregate_sales(new_rows, self.aggregate.distinct, self.aggregate.precision)
+        )
+        self.offset = self._end
+        self.fingerprint = _fingerprint_file(self._file, self.offset)
+        return len(new_rows)
+
+    def poll(self):
+        """
+        Folds any newly written complete lines into the aggregate
+        Returns: number of new valid rows (0 when nothing changed)
+        """
+
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            # Rotated or deleted: finish the old file and wait for a new one
+            return self._drain()
+
+        if (stat.st_dev, stat.st_ino) != self._inode:
+            new_rows = self._drain(final=True)
+
+            self._file.close()
+            self._file = open(self.filename, 'rb')
+            self._inode = self._file_inode()
+            self._restart()
+
+            return new_rows + self._drain()
+
+        if stat.st_size < self.offset or _fingerprint_file(self._file, self.offset) != self.fingerprint:
+            # Rewritten in place: nothing processed so far can be trusted
+            self.mode = 'full'
+            self.aggregate = SalesAggregate(self.distinct, self.precision)
+            self._restart()
+
+        return self._drain()
+
+    def save(self):
+        """
+        Writes the current aggregate and file position to the checkpoint
+        """
+
+        if self.checkpoint_path:
+            # The stored fingerprint lets this work while the file is missing
+            _save(
+                self.checkpoint_path, self.filename, self.encoding, self.offset,
+                self.aggregate, fingerprint=self.fingerprint
+            )
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,239 @@
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+
+MAGIC = b'SALESCOL'
+FORMAT_VERSION = 2
+ALIGNMENT = 8
+
+# Column name -> storage type, in file order
+ENRICHED_COLUMNS = [
+    ('TransactionID', 'string'),
+    ('Date', 'dict'),
+    ('ProductID', 'dict'),
+    ('ProductName', 'dict'),
+    ('Quantity', 'int64'),
+    ('UnitPrice', 'float64'),
+    ('CustomerID', 'dict'),
+    ('Region', 'dict'),
+    ('API_Category', 'dict'),
+    ('API_Brand', 'dict'),
+    ('API_Rating', 'float64'),
+    ('API_Match', 'bool')
+]
+
+_TYPECODES = {'int64': 'q', 'float64': 'd', 'bool': 'B', 'dict': 'I', 'string': 'Q'}
+
+def _encode_strings(values):
+    # Never-repeating strings: uint64 offsets followed by one UTF-8 buffer,
+    # the same layout as table._StringColumn
+    buffer = bytearray()
+    offsets = array('Q', [0])
+    for value in values:
+        buffer += value.encode('utf-8')
+        offsets.append(len(buffer))
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets.tobytes(), bytes(buffer)
+
+def _encode_column(values, column_type):
+    if column_type == 'dict':
+        codes = {}
+        dictionary = []
+        encoded = array('I')
+        for value in values:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            encoded.append(code)
+        return encoded, dictionary
+
+    if column_type == 'float64':
+        # None (no API match) is stored as NaN
+        return array('d', (math.nan if value is None else float(value) for value in values)), None
+
+    if column_type == 'bool':
+        return array('B', (1 if value else 0 for value in values)), None
+
+    return array('q', values), None
+
+def _padding(position):
+    return -position % ALIGNMENT
+
+def save_enriched_columnar(enriched_transactions, filename):
+    """
+    Saves enriched transactions as a typed, dictionary-encoded column file
+
+    Layout: 8-byte magic, uint32 version, uint32 header length, a JSON
+    header index (row count, per-column type, offset, length and string
+    dictionary), then each column as a little-endian array aligned to
+    8 bytes from the start of the column data, so it can be memory-mapped
+    back without parsing. Unique strings (TransactionID) are stored as an
+    offsets array followed by a UTF-8 buffer rather than a dictionary, so
+    the header stays small whatever the row count.
+    """
+
+    rows = enriched_transactions if isinstance(enriched_transactions, list) else list(enriched_transactions)
+
+    blobs = []
+    columns = []
+
+    for name, column_type in ENRICHED_COLUMNS:
+        column = {'name': name, 'type': column_type}
+
+        if column_type == 'string':
+            offsets, text = _encode_strings(tx.get(name) for tx in rows)
+            blob = offsets + text
+            column['offsets_length'] = len(offsets)
+        else:
+            encoded, dictionary = _encode_column([tx.get(name) for tx in rows], column_type)
+            if sys.byteorder == 'big':
+                encoded.byteswap()
+            blob = encoded.tobytes()
+            column['values'] = dictionary
+
+        column['length'] = len(blob)
+        blobs.append(blob)
+        columns.append(column)
+
+    # Offsets are relative to the aligned start of the column data
+    position = 0
+    for column, blob in zip(columns, blobs):
+        column['offset'] = position
+        position += len(blob) + _padding(len(blob))
+
+    header = json.dumps({'rows': len(rows), 'columns': columns}).encode('utf-8')
+
+    with open(filename, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack('<II', FORMAT_VERSION, len(header)))
+        file.write(header)
+        file.write(b'\0' * _padding(file.tell()))
+
+        for blob in blobs:
+            file.write(blob)
+            file.write(b'\0' * _padding(len(blob)))
+
+class EnrichedColumns:
+    """
+    Memory-mapped reader for files written by save_enriched_columnar
+    Every column is a zero-copy memoryview over the mapping; dictionary
+    columns hold int codes into the matching list in dictionaries, and
+    unique-string columns are an offsets view plus a UTF-8 buffer view in
+    strings. Iterating yields the same row dictionaries that were saved.
+    """
+
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a columnar sales file")
+
+        version, header_size = struct.unpack_from('<II', self._map, len(MAGIC))
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported columnar format version {version}")
+
+        start = len(MAGIC) + 8
+        header = json.loads(self._map[start:start + header_size].decode('utf-8'))
+
+        self.rows = header['rows']
+        self.columns = {}
+        self.dictionaries = {}
+        self.strings = {}
+
+        data_start = start + header_size
+        data_start += _padding(data_start)
+
+        view = memoryview(self._map)
+        for column in header['columns']:
+            offset = data_start + column['offset']
+            data = view[offset:offset + column['length']]
+            typecode = _TYPECODES[column['type']]
+            if column['type'] == 'string':
+                self.strings[column['name']] = data[column['offsets_length']:]
+                data = data[:column['offsets_length']]
+            if sys.byteorder == 'big':
+                swapped = array(typecode, data.tobytes())
+                swapped.byteswap()
+                data = memoryview(swapped)
+            else:
+                data = data.cast(typecode)
+            self.columns[column['name']] = data
+            if column['type'] == 'dict':
+                self.dictionaries[column['name']] = column['values']
+        view.release()
+
+    def column(self, name):
+        """
+        Returns: decoded list of values for one column
+        """
+
+        data = self.columns[name]
+        if name in self.dictionaries:
+            values = self.dictionaries[name]
+            return [values[code] for code in data]
+        if name in self.strings:
+            return [self._string(name, index) for index in range(self.rows)]
+        return data.tolist()
+
+    def _string(self, name, index):
+        offsets = self.columns[name]
+        return self.strings[name][offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+    def row(self, index):
+        """
+        Returns: enriched transaction dictionary for one row
+        """
+
+        tx = {}
+        for name, column_type in ENRICHED_COLUMNS:
+            if column_type == 'string':
+                tx[name] = self._string(name, index)
+                continue
+            value = self.columns[name][index]
+            if column_type == 'dict':
+                value = self.dictionaries[name][value]
+            elif column_type == 'bool':
+                value = bool(value)
+            elif name == 'API_Rating' and math.isnan(value):
+                value = None
+            tx[name] = value
+        return tx
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        for index in range(self.rows):
+            yield self.row(index)
+
+    def close(self):
+        for data in getattr(self, 'columns', {}).values():
+            data.release()
+        for data in getattr(self, 'strings', {}).values():
+            data.release()
+        self.columns = {}
+        self.strings = {}
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def load_enriched_columnar(filename):
+    """
+    Opens a columnar enriched sales file without parsing any text
+    Returns: EnrichedColumns (use as a context manager to release the map)
+    """
+
+    return EnrichedColumns(filename)
@@ -0,0 +1,230 @@
+import json
+
+from utils.aggregator import SalesAggregate
+from utils.money import to_paise
+from utils.file_handler import write_json_atomic
+
+CUBE_VERSION = 2
+DIMENSIONS = ('date', 'region', 'product', 'segment')
+SEGMENTS = ('customer', 'none')
+
+class SalesCube:
+    """
+    Materialised rollup of quantity, revenue (integer paise) and
+    transaction count by (date, region, product, customer segment)
+
+    With segment='customer' every CustomerID is its own segment, so the
+    cube reproduces every analytic exactly. segment='none' collapses all
+    customers into one cell per (date, region, product), which keeps the
+    cube small but leaves customer-level analytics empty.
+    """
+
+    def __init__(self, segment='customer'):
+        if segment not in SEGMENTS:
+            raise ValueError(f"Unknown cube segment: {segment}")
+
+        self.segment = segment
+        # (date, region, product, segment) -> [quantity, revenue, count]
+        self.cells = {}
+
+    def update(self, transactions):
+        """
+        Folds an iterable of transaction dictionaries into the cube
+        Returns: self, so calls can be chained
+        """
+
+        cells = self.cells
+        by_customer = self.segment == 'customer'
+
+        for tx in transactions:
+            qty = tx['Quantity']
+            amount = qty * to_paise(tx['UnitPrice'])
+            key = (
+                tx['Date'],
+                tx['Region'],
+                tx['ProductName'],
+                tx['CustomerID'] if by_customer else ''
+            )
+
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [qty, amount, 1]
+            else:
+                cell[0] += qty
+                cell[1] += amount
+                cell[2] += 1
+
+        return self
+
+    def merge(self, other):
+        """
+        Folds another cube with the same segmentation into this one
+        Returns: self, so calls can be chained
+        """
+
+        if other.segment != self.segment:
+            raise ValueError("Cannot merge cubes with different segments")
+
+        cells = self.cells
+        for key, (qty, revenue, count) in other.cells.items():
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [qty, revenue, count]
+            else:
+                cell[0] += qty
+                cell[1] += revenue
+                cell[2] += count
+
+        return self
+
+    def dates(self):
+        """
+        Returns: sorted list of dates present in the cube
+        """
+
+        return sorted({key[0] for key in self.cells})
+
+    def to_aggregate(self, start_date=None, end_date=None, region=None):
+        """
+        Rolls the cube (or an inclusive date window / single region of it)
+        up into a SalesAggregate, which every analytic and the report accept
+        Returns: SalesAggregate with exact distinct counts
+        """
+
+        aggregate = SalesAggregate()
+        regions = aggregate.regions
+        products = aggregate.products
+        customers = aggregate.customers
+        daily = aggregate.daily
+        by_customer = self.segment == 'customer'
+
+        count_all = 0
+        total = 0
+
+        for (date, cell_region, product, segment), (qty, revenue, count) in self.cells.items():
+            if start_date is not None and date < start_date:
+                continue
+            if end_date is not None and date > end_date:
+                continue
+            if region is not None and cell_region != region:
+                continue
+
+            count_all += count
+            total += revenue
+
+            region_entry = regions.get(cell_region)
+            if region_entry is None:
+                region_entry = regions[cell_region] = {
+                    'total_sales': 0,
+                    'transaction_count': 0
+                }
+            region_entry['total_sales'] += revenue
+            region_entry['transaction_count'] += count
+
+            product_entry = products.get(product)
+            if product_entry is None:
+                product_entry = products[product] = {
+                    'total_quantity': 0,
+                    'total_revenue': 0
+                }
+            product_entry['total_quantity'] += qty
+            product_entry['total_revenue'] += revenue
+
+            day_entry = daily.get(date)
+            if day_entry is None:
+                day_entry = daily[date] = {
+                    'revenue': 0,
+                    'transaction_count': 0,
+                    'customers': set()
+                }
+            day_entry['revenue'] += revenue
+            day_entry['transaction_count'] += count
+
+            if by_customer:
+                day_entry['customers'].add(segment)
+
+                customer_entry = customers.get(segment)
+                if customer_entry is None:
+                    customer_entry = customers[segment] = {
+                        'total_spent': 0,
+                        'purchase_count': 0,
+                        'products_bought': set()
+                    }
+                customer_entry['total_spent'] += revenue
+                customer_entry['purchase_count'] += count
+                customer_entry['products_bought'].add(product)
+
+        aggregate.transaction_count = count_all
+        aggregate.total_revenue = total
+
+        return aggregate
+
+    def to_dict(self):
+        """
+        Converts the cube into JSON-serialisable form
+        Dimension values are stored once and cells refer to them by index.
+        Returns: dictionary understood by SalesCube.from_dict
+        """
+
+        values = [{} for _ in DIMENSIONS]
+        cells = []
+
+        for key, (qty, revenue, count) in self.cells.items():
+            codes = [
+                dimension.setdefault(value, len(dimension))
+                for dimension, value in zip(values, key)
+            ]
+            cells.append(codes + [qty, revenue, count])
+
+        return {
+            'version': CUBE_VERSION,
+            'segment': self.segment,
+            'dimensions': {
+                name: list(dimension) for name, dimension in zip(DIMENSIONS, values)
+            },
+            'cells': cells
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuilds a cube from the output of to_dict
+        Returns: SalesCube
+        """
+
+        if state.get('version') != CUBE_VERSION:
+            raise ValueError(f"Unsupported cube version {state.get('version')}")
+
+        cube = cls(state['segment'])
+        dates, regions, products, segments = (state['dimensions'][name] for name in DIMENSIONS)
+
+        cube.cells = {
+            (dates[d], regions[r], products[p], segments[s]): [qty, revenue, count]
+            for d, r, p, s, qty, revenue, count in state['cells']
+        }
+
+        return cube
+
+def build_cube(transactions, segment='customer'):
+    """
+    Builds a rollup cube from validated transactions
+    Returns: SalesCube
+    """
+
+    return SalesCube(segment).update(transactions)
+
+def save_cube(cube, filename):
+    """
+    Writes a cube atomically as JSON
+    """
+
+    write_json_atomic(filename, cube.to_dict(), separators=(',', ':'))
+
+def load_cube(filename):
+    """
+    Loads a cube saved by save_cube
+    Returns: SalesCube
+    """
+
+    with open(filename, 'r', encoding='utf-8') as file:
+        return SalesCube.from_dict(json.load(file))
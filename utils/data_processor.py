@@ -1,47 +1,163 @@
-def clean_and_validate_data(raw_records):
-    valid_records = []
-    invalid_count = 0
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.aggregator import SalesAggregate
+from utils.cube import SalesCube
+from utils.file_handler import detect_encoding, split_byte_ranges, iter_byte_range
+from utils.table import TransactionTable
+from utils.sketches import SpaceSaving, HyperLogLog
+from utils.money import to_paise, to_rupees
+
+# Rejection counters reported by parse_and_validate, in the order rules are checked
+REJECTION_RULES = (
+    'field_count', 'number_format', 'quantity', 'unit_price',
+    'transaction_id', 'product_id', 'customer_id', 'region', 'duplicate'
+)
+
+def _checked_rows(raw_lines, validate, require_region, counts):
+    # Yields the eight converted fields of every row that passes the business
+    # rules; rejections and the line total are tallied into counts
+    total = 0
 
-    for record in raw_records:
-        try:
-            parts = [p.strip() for p in record.split('|')]
+    for line in raw_lines:
+        total += 1
+        parts = [p.strip() for p in line.split('|')]
 
-            if len(parts) != 8:
-                invalid_count += 1
-                continue
+        if len(parts) != 8:
+            counts['field_count'] += 1
+            continue
+
+        transaction_id, date, product_id, product_name, quantity, unit_price, customer_id, region = parts
 
-            transaction_id, date, product_id, product_name, qty, price, customer_id, region = parts
+        try:
+            quantity = int(quantity.replace(',', '') if ',' in quantity else quantity)
+            unit_price = float(unit_price.replace(',', '') if ',' in unit_price else unit_price)
+        except ValueError:
+            counts['number_format'] += 1
+            continue
 
+        if validate:
+            if quantity <= 0:
+                counts['quantity'] += 1
+                continue
+            if unit_price <= 0:
+                counts['unit_price'] += 1
+                continue
             if not transaction_id.startswith('T'):
-                invalid_count += 1
+                counts['transaction_id'] += 1
                 continue
-            if not customer_id or not region:
-                invalid_count += 1
+            if not product_id.startswith('P'):
+                counts['product_id'] += 1
+                continue
+            if not customer_id.startswith('C'):
+                counts['customer_id'] += 1
+                continue
+            if require_region and not region:
+                counts['region'] += 1
                 continue
 
-            qty = int(qty.replace(',', ''))
-            price = float(price.replace(',', ''))
+        if ',' in product_name:
             product_name = product_name.replace(',', '')
 
-            if qty <= 0 or price <= 0:
-                invalid_count += 1
-                continue
+        yield (transaction_id, date, product_id, product_name,
+               quantity, unit_price, customer_id, region)
+
+    counts['lines'] = total
+
+def _apply_rules(rows, rules, counts):
+    # Caller-specific (name, predicate) checks over the eight field values;
+    # rejected rows are counted under the rule's name
+    for name, _ in rules:
+        counts[name] = 0
+
+    for row in rows:
+        failed = next((name for name, predicate in rules if not predicate(*row)), None)
+        if failed is None:
+            yield row
+        else:
+            counts[failed] += 1
+
+def _drop_duplicate_rows(rows, deduplicator, counts):
+    # Runs last so a rejected row never shadows a later valid one
+    is_duplicate = deduplicator.is_duplicate
+    for row in rows:
+        if is_duplicate(row[0]):
+            counts['duplicate'] += 1
+        else:
+            yield row
+
+def _validated_rows(raw_lines, validate, require_region, deduplicator, rules, counts):
+    rows = _checked_rows(raw_lines, validate, require_region, counts)
+    if rules:
+        rows = _apply_rules(rows, rules, counts)
+    if deduplicator is not None:
+        rows = _drop_duplicate_rows(rows, deduplicator, counts)
+    return rows
+
+def _parse_report(counts, kept):
+    rejected = {rule: count for rule, count in counts.items() if rule != 'lines'}
+    return {
+        'lines': counts['lines'],
+        'parsed': counts['lines'] - rejected['field_count'] - rejected['number_format'],
+        'valid': kept,
+        'rejected': rejected
+    }
 
-            valid_records.append({
-                "TransactionID": transaction_id,
-                "Date": date,
-                "ProductID": product_id,
-                "ProductName": product_name,
-                "Quantity": qty,
-                "UnitPrice": price,
-                "CustomerID": customer_id,
-                "Region": region
-            })
-
-        except:
-            invalid_count += 1
+def parse_and_validate(raw_lines, validate=True, require_region=False, deduplicator=None, rules=()):
+    """
+    Parses and validates raw lines in a single pass, so rejected rows never
+    become dictionaries; rules are extra (name, predicate) checks
+    Returns: (list of transaction dictionaries, report of per-rule rejections)
+    """
+
+    counts = dict.fromkeys(REJECTION_RULES, 0)
+    transactions = [
+        {
+            'TransactionID': transaction_id,
+            'Date': date,
+            'ProductID': product_id,
+            'ProductName': product_name,
+            'Quantity': quantity,
+            'UnitPrice': unit_price,
+            'CustomerID': customer_id,
+            'Region': region
+        }
+        for (transaction_id, date, product_id, product_name,
+             quantity, unit_price, customer_id, region) in _validated_rows(
+            raw_lines, validate, require_region, deduplicator, rules, counts
+        )
+    ]
 
-    print(f"Total records parsed: {len(raw_records)}")
+    return transactions, _parse_report(counts, len(transactions))
+
+def parse_and_validate_table(raw_lines, table=None, validate=True, require_region=False,
+                             deduplicator=None, rules=()):
+    """
+    Same rules and report as parse_and_validate, but kept rows are appended
+    to a TransactionTable instead of becoming dictionaries
+    Returns: (TransactionTable, parse report)
+    """
+
+    table = TransactionTable() if table is None else table
+    counts = dict.fromkeys(REJECTION_RULES, 0)
+    append_row = table.append
+    kept = 0
+
+    for (transaction_id, date, product_id, product_name,
+         quantity, unit_price, customer_id, region) in _validated_rows(
+            raw_lines, validate, require_region, deduplicator, rules, counts):
+        append_row(transaction_id, date, product_id, product_name,
+                   quantity, to_paise(unit_price), customer_id, region)
+        kept += 1
+
+    return table, _parse_report(counts, kept)
+
+def clean_and_validate_data(raw_records):
+    valid_records, report = parse_and_validate(raw_records, require_region=True)
+    invalid_count = report['lines'] - report['valid']
+
+    print(f"Total records parsed: {report['lines']}")
     print(f"Invalid records removed: {invalid_count}")
     print(f"Valid records after cleaning: {len(valid_records)}")
 
@@ -50,47 +166,101 @@ def clean_and_validate_data(raw_records):
 def parse_transactions(raw_lines):
     """
     Parses raw lines into clean list of dictionaries
+    Accepts any iterable of lines, including the iter_sales_data generator
     Returns: list of dictionaries with cleaned transaction data
     """
 
-    transactions = []
+    transactions, _ = parse_and_validate(raw_lines, validate=False)
 
-    for line in raw_lines:
-        # Split by pipe delimiter
-        parts = [p.strip() for p in line.split('|')]
+    return transactions
 
-        # Skip rows with incorrect number of fields
-        if len(parts) != 8:
-            continue
+def parse_transactions_table(raw_lines, validate=False):
+    """
+    Parses raw lines straight into a columnar TransactionTable
+    Rows are never materialised as dictionaries. Parsing and validation
+    are shared with parse_and_validate, so the table holds exactly the
+    rows the dictionary path keeps.
+    Returns: TransactionTable
+    """
 
-        try:
-            transaction_id, date, product_id, product_name, quantity, unit_price, customer_id, region = parts
+    table, _ = parse_and_validate_table(raw_lines, validate=validate)
 
-            # Handle commas in ProductName
-            product_name = product_name.replace(',', '')
+    return table
 
-            # Handle commas in numeric fields
-            quantity = int(quantity.replace(',', ''))
-            unit_price = float(unit_price.replace(',', ''))
-
-            transaction = {
-                'TransactionID': transaction_id,
-                'Date': date,
-                'ProductID': product_id,
-                'ProductName': product_name,
-                'Quantity': quantity,
-                'UnitPrice': unit_price,
-                'CustomerID': customer_id,
-                'Region': region
-            }
+def _parse_shard(shard):
+    # Runs in a worker process: parse and validate one byte range into a
+    # compact table plus its per-rule rejection counts
+    filename, start, end, encoding, validate = shard
+    return parse_and_validate_table(
+        iter_byte_range(filename, start, end, encoding),
+        validate=validate
+    )
 
-            transactions.append(transaction)
+def _merge_reports(total, report):
+    total['lines'] += report['lines']
+    total['parsed'] += report['parsed']
+    total['valid'] += report['valid']
+    for rule, count in report['rejected'].items():
+        total['rejected'][rule] += count
 
-        except ValueError:
-            # Skip records with conversion issues
-            continue
+def parse_and_validate_parallel(filename, workers=None, validate=True, shards_per_worker=4):
+    """
+    Parses and validates a sales file on several cores by splitting it
+    into byte ranges
+    Each worker applies the parse_and_validate rules to its newline-aligned
+    range and returns a TransactionTable, which pickles as a handful of
+    typed arrays instead of a list of dictionaries, plus its rejection
+    counts. Tables are merged back in file order.
+    Returns: (TransactionTable, parse report as from parse_and_validate)
+    """
 
-    return transactions
+    workers = workers or os.cpu_count() or 1
+
+    table = TransactionTable()
+    report = {
+        'lines': 0,
+        'parsed': 0,
+        'valid': 0,
+        'rejected': dict.fromkeys(REJECTION_RULES, 0)
+    }
+
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return table, report
+
+    if encoding is None:
+        print("Error: Unable to read file with supported encodings.")
+        return table, report
+
+    # Extra shards keep every worker busy when ranges parse unevenly
+    ranges = split_byte_ranges(filename, workers * shards_per_worker)
+    shards = [(filename, start, end, encoding, validate) for start, end in ranges]
+
+    if workers == 1:
+        results = map(_parse_shard, shards)
+        for partial, partial_report in results:
+            table.extend(partial)
+            _merge_reports(report, partial_report)
+        return table, report
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial, partial_report in executor.map(_parse_shard, shards):
+            table.extend(partial)
+            _merge_reports(report, partial_report)
+
+    return table, report
+
+def parse_transactions_parallel(filename, workers=None, validate=True, shards_per_worker=4):
+    """
+    Parses a sales file on several cores by splitting it into byte ranges
+    Returns: TransactionTable (see parse_and_validate_parallel)
+    """
+
+    table, _ = parse_and_validate_parallel(filename, workers, validate, shards_per_worker)
+
+    return table
 
 def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
     """
@@ -207,18 +377,39 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
 
     return filtered_transactions, invalid_count, filter_summary
 
+def aggregate_sales(transactions, distinct='exact', precision=12):
+    """
+    Computes every sales analytic in a single pass over the transactions
+    Accepts a list of transaction dictionaries or a TransactionTable.
+    distinct='hll' counts unique customers and products with HyperLogLog
+    sketches of the given precision instead of exact sets.
+    Returns: SalesAggregate accepted by all analytics functions below
+    """
+
+    aggregate = SalesAggregate(distinct, precision)
+
+    if isinstance(transactions, TransactionTable):
+        return aggregate.update_table(transactions)
+
+    return aggregate.update(transactions)
+
+def _as_aggregate(data):
+    # Analytics accept raw transactions, a precomputed SalesAggregate or a cube
+    if isinstance(data, SalesAggregate):
+        return data
+    if isinstance(data, SalesCube):
+        return data.to_aggregate()
+    return aggregate_sales(data)
+
 def calculate_total_revenue(transactions):
     """
     Calculates total revenue from all transactions
     Returns: float
     """
 
-    total_revenue = 0.0
+    aggregate = _as_aggregate(transactions)
 
-    for tx in transactions:
-        total_revenue += tx['Quantity'] * tx['UnitPrice']
-
-    return round(total_revenue, 2)
+    return to_rupees(aggregate.total_revenue)
 
 def region_wise_sales(transactions):
     """
@@ -226,28 +417,19 @@ def region_wise_sales(transactions):
     Returns: dictionary sorted by total_sales descending
     """
 
-    region_data = {}
-    total_sales_all = 0.0
-
-    # Aggregate data
-    for tx in transactions:
-        region = tx['Region']
-        amount = tx['Quantity'] * tx['UnitPrice']
-        total_sales_all += amount
-
-        if region not in region_data:
-            region_data[region] = {
-                'total_sales': 0.0,
-                'transaction_count': 0
-            }
+    aggregate = _as_aggregate(transactions)
+    total_sales_all = aggregate.total_revenue
 
-        region_data[region]['total_sales'] += amount
-        region_data[region]['transaction_count'] += 1
+    region_data = {}
 
     # Calculate percentages
-    for region in region_data:
-        percentage = (region_data[region]['total_sales'] / total_sales_all) * 100
-        region_data[region]['percentage'] = round(percentage, 2)
+    for region, data in aggregate.regions.items():
+        percentage = (data['total_sales'] / total_sales_all) * 100
+        region_data[region] = {
+            'total_sales': to_rupees(data['total_sales']),
+            'transaction_count': data['transaction_count'],
+            'percentage': round(percentage, 2)
+        }
 
     # Sort by total_sales descending
     sorted_regions = dict(
@@ -266,69 +448,87 @@ def top_selling_products(transactions, n=5):
     Returns: list of tuples
     """
 
-    product_data = {}
+    aggregate = _as_aggregate(transactions)
 
-    for tx in transactions:
-        product = tx['ProductName']
-        qty = tx['Quantity']
-        revenue = qty * tx['UnitPrice']
-
-        if product not in product_data:
-            product_data[product] = {
-                'total_quantity': 0,
-                'total_revenue': 0.0
-            }
-
-        product_data[product]['total_quantity'] += qty
-        product_data[product]['total_revenue'] += revenue
+    # Heap selection keeps n entries instead of sorting every product
+    top_products = heapq.nlargest(
+        n,
+        aggregate.products.items(),
+        key=lambda item: item[1]['total_quantity']
+    )
 
-    # Convert to list of tuples
-    product_list = [
+    return [
         (product,
          data['total_quantity'],
-         round(data['total_revenue'], 2))
-        for product, data in product_data.items()
+         to_rupees(data['total_revenue']))
+        for product, data in top_products
     ]
 
-    # Sort by total_quantity descending
-    product_list.sort(key=lambda x: x[1], reverse=True)
+def heavy_hitter_products(transactions, n=5, capacity=1000):
+    """
+    Estimates the top n products by quantity in fixed memory
+    Uses a Space-Saving sketch of at most capacity products, so it can run
+    over an unbounded stream of transactions with any number of SKUs.
+    Returns: list of tuples (ProductName, EstimatedQuantity, MaxError)
+    """
+
+    sketch = SpaceSaving(capacity)
+
+    for tx in transactions:
+        sketch.update(tx['ProductName'], tx['Quantity'])
+
+    return sketch.top(n)
+
+def heavy_hitter_customers(transactions, n=5, capacity=1000):
+    """
+    Estimates the top n customers by amount spent in fixed memory
+    Returns: list of tuples (CustomerID, EstimatedSpent, MaxError)
+    """
+
+    sketch = SpaceSaving(capacity)
+
+    for tx in transactions:
+        sketch.update(tx['CustomerID'], tx['Quantity'] * to_paise(tx['UnitPrice']))
 
-    return product_list[:n]
+    return [
+        (customer, to_rupees(spent), to_rupees(error))
+        for customer, spent, error in sketch.top(n)
+    ]
 
 def customer_analysis(transactions):
     """
     Analyzes customer purchase patterns
+    In HyperLogLog mode products_bought is replaced by an estimated
+    unique_products count.
     Returns: dictionary sorted by total_spent descending
     """
 
+    aggregate = _as_aggregate(transactions)
+
     customer_data = {}
 
-    for tx in transactions:
-        customer = tx['CustomerID']
-        amount = tx['Quantity'] * tx['UnitPrice']
-        product = tx['ProductName']
+    # Final calculations
+    for customer, data in aggregate.customers.items():
+        total = data['total_spent']
+        count = data['purchase_count']
+
+        products = data['products_bought']
 
-        if customer not in customer_data:
+        if isinstance(products, HyperLogLog):
+            # Sketch mode only knows how many products, not which
             customer_data[customer] = {
-                'total_spent': 0.0,
-                'purchase_count': 0,
-                'products_bought': set()
+                'total_spent': to_rupees(total),
+                'purchase_count': count,
+                'unique_products': len(products),
+                'avg_order_value': round(to_rupees(total) / count, 2)
+            }
+        else:
+            customer_data[customer] = {
+                'total_spent': to_rupees(total),
+                'purchase_count': count,
+                'products_bought': list(products),
+                'avg_order_value': round(to_rupees(total) / count, 2)
             }
-
-        customer_data[customer]['total_spent'] += amount
-        customer_data[customer]['purchase_count'] += 1
-        customer_data[customer]['products_bought'].add(product)
-
-    # Final calculations
-    for customer in customer_data:
-        total = customer_data[customer]['total_spent']
-        count = customer_data[customer]['purchase_count']
-
-        customer_data[customer]['avg_order_value'] = round(total / count, 2)
-        customer_data[customer]['total_spent'] = round(total, 2)
-        customer_data[customer]['products_bought'] = list(
-            customer_data[customer]['products_bought']
-        )
 
     # Sort by total_spent descending
     sorted_customers = dict(
@@ -347,29 +547,17 @@ def daily_sales_trend(transactions):
     Returns: dictionary sorted by date
     """
 
-    daily_data = {}
-
-    for tx in transactions:
-        date = tx['Date']
-        amount = tx['Quantity'] * tx['UnitPrice']
-        customer = tx['CustomerID']
-
-        if date not in daily_data:
-            daily_data[date] = {
-                'revenue': 0.0,
-                'transaction_count': 0,
-                'customers': set()
-            }
+    aggregate = _as_aggregate(transactions)
 
-        daily_data[date]['revenue'] += amount
-        daily_data[date]['transaction_count'] += 1
-        daily_data[date]['customers'].add(customer)
+    daily_data = {}
 
     # Convert customers set to count & round revenue
-    for date in daily_data:
-        daily_data[date]['unique_customers'] = len(daily_data[date]['customers'])
-        daily_data[date]['revenue'] = round(daily_data[date]['revenue'], 2)
-        del daily_data[date]['customers']
+    for date, data in aggregate.daily.items():
+        daily_data[date] = {
+            'revenue': to_rupees(data['revenue']),
+            'transaction_count': data['transaction_count'],
+            'unique_customers': len(data['customers'])
+        }
 
     # Sort chronologically by date
     sorted_daily_data = dict(sorted(daily_data.items()))
@@ -382,29 +570,16 @@ def find_peak_sales_day(transactions):
     Returns: (date, revenue, transaction_count)
     """
 
-    daily_summary = {}
-
-    for tx in transactions:
-        date = tx['Date']
-        amount = tx['Quantity'] * tx['UnitPrice']
-
-        if date not in daily_summary:
-            daily_summary[date] = {
-                'revenue': 0.0,
-                'transaction_count': 0
-            }
-
-        daily_summary[date]['revenue'] += amount
-        daily_summary[date]['transaction_count'] += 1
+    aggregate = _as_aggregate(transactions)
 
     # Find peak sales day
     peak_date = max(
-        daily_summary.items(),
+        aggregate.daily.items(),
         key=lambda item: item[1]['revenue']
     )
 
     date = peak_date[0]
-    revenue = round(peak_date[1]['revenue'], 2)
+    revenue = to_rupees(peak_date[1]['revenue'])
     count = peak_date[1]['transaction_count']
 
     return (date, revenue, count)
@@ -415,31 +590,16 @@ def low_performing_products(transactions, threshold=10):
     Returns: list of tuples (ProductName, TotalQuantity, TotalRevenue)
     """
 
-    product_data = {}
-
-    # Aggregate quantity and revenue per product
-    for tx in transactions:
-        product = tx['ProductName']
-        qty = tx['Quantity']
-        revenue = qty * tx['UnitPrice']
-
-        if product not in product_data:
-            product_data[product] = {
-                'total_quantity': 0,
-                'total_revenue': 0.0
-            }
-
-        product_data[product]['total_quantity'] += qty
-        product_data[product]['total_revenue'] += revenue
+    aggregate = _as_aggregate(transactions)
 
     # Filter low-performing products
     low_products = [
         (
             product,
             data['total_quantity'],
-            round(data['total_revenue'], 2)
+            to_rupees(data['total_revenue'])
         )
-        for product, data in product_data.items()
+        for product, data in aggregate.products.items()
         if data['total_quantity'] < threshold
     ]
 
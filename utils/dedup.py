@@ -0,0 +1,156 @@
+import math
+from hashlib import blake2b as _blake2b
+
+DEDUP_MODES = ('exact', 'bloom')
+
+_LOW_64 = (1 << 64) - 1
+
+class ExactDeduplicator:
+    """
+    Remembers every TransactionID in a set; never misses or misreports a
+    duplicate, but memory grows with the number of distinct IDs
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.checked = 0
+        self.duplicates = 0
+
+    def is_duplicate(self, key):
+        """
+        Records key and reports whether it was seen before
+        Returns: bool
+        """
+
+        self.checked += 1
+        if key in self.seen:
+            self.duplicates += 1
+            return True
+        self.seen.add(key)
+        return False
+
+    def stats(self):
+        """
+        Returns: dictionary describing the deduplicator and what it found
+        """
+
+        return {
+            'mode': 'exact',
+            'checked': self.checked,
+            'duplicates': self.duplicates,
+            'distinct': len(self.seen)
+        }
+
+class BloomDeduplicator:
+    """
+    Partitioned Bloom filter over TransactionIDs in fixed memory
+
+    The bit array is split into one partition per hash function and each
+    key sets one bit in every partition. It is sized for capacity keys at
+    error_rate false positives; when that would exceed max_bytes the
+    filter is capped at max_bytes and the error rate it can actually
+    reach is reported instead. A false positive drops a unique row as a
+    duplicate, while a real duplicate is never missed.
+    """
+
+    def __init__(self, capacity=10_000_000, error_rate=0.001, max_bytes=None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        if max_bytes is not None:
+            bits = min(bits, max_bytes * 8)
+
+        self.capacity = capacity
+        self.hash_count = max(1, round(bits / capacity * math.log(2)))
+        self.partition_bits = max(8, bits // self.hash_count)
+        self.bits = bytearray(math.ceil(self.partition_bits * self.hash_count / 8))
+        self._offsets = range(0, self.partition_bits * self.hash_count, self.partition_bits)
+
+        self.checked = 0
+        self.duplicates = 0
+        self.added = 0
+
+    def is_duplicate(self, key):
+        """
+        Records key and reports whether it was (probably) seen before
+        Returns: bool
+        """
+
+        self.checked += 1
+
+        # Double hashing: partition i sets bit (h1 + i * h2) mod partition_bits
+        hashed = int.from_bytes(_blake2b(key.encode('utf-8'), digest_size=16).digest(), 'little')
+        size = self.partition_bits
+        # Reduced up front so the loop stays on small ints
+        step = ((hashed >> 64) | 1) % size
+        slot = (hashed & _LOW_64) % size
+
+        bits = self.bits
+        present = True
+
+        for offset in self._offsets:
+            position = offset + slot
+            mask = 1 << (position & 7)
+            position >>= 3
+            if not bits[position] & mask:
+                present = False
+                bits[position] |= mask
+            slot += step
+            if slot >= size:
+                slot -= size
+
+        if present:
+            self.duplicates += 1
+        else:
+            self.added += 1
+        return present
+
+    def error_rate(self, items=None):
+        """
+        Returns: expected false-positive rate once items keys were added
+        (default: the configured capacity)
+        """
+
+        items = self.capacity if items is None else items
+        return (1 - math.exp(-items / self.partition_bits)) ** self.hash_count
+
+    def stats(self):
+        """
+        Returns: dictionary describing the filter and what it found
+        """
+
+        return {
+            'mode': 'bloom',
+            'checked': self.checked,
+            'duplicates': self.duplicates,
+            'distinct': self.added,
+            'memory_bytes': len(self.bits),
+            'hash_count': self.hash_count,
+            'capacity': self.capacity,
+            'error_rate_at_capacity': self.error_rate(),
+            'current_error_rate': self.error_rate(self.added)
+        }
+
+def make_deduplicator(mode='exact', capacity=10_000_000, error_rate=0.001, max_bytes=None):
+    """
+    Builds the deduplicator for a --dedup mode
+    Returns: ExactDeduplicator or BloomDeduplicator
+    """
+
+    if mode == 'exact':
+        return ExactDeduplicator()
+    if mode == 'bloom':
+        return BloomDeduplicator(capacity, error_rate, max_bytes)
+    raise ValueError(f"Unknown dedup mode {mode!r}; expected one of {DEDUP_MODES}")
+
+def drop_duplicates(transactions, deduplicator):
+    """
+    Keeps the first transaction for each TransactionID
+    Returns: list of transaction dictionaries
+    """
+
+    is_duplicate = deduplicator.is_duplicate
+    return [tx for tx in transactions if not is_duplicate(tx['TransactionID'])]
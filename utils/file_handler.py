@@ -1,30 +1,205 @@
+import codecs
+import json
+import mmap
+import os
+
+SUPPORTED_ENCODINGS = ['utf-8', 'latin-1', 'cp1252']
+
+def detect_encoding(filename, sample_size=65536):
+    """
+    Sniffs the file encoding from a leading byte sample
+    Returns: name of the first supported encoding that decodes the sample
+    """
+
+    with open(filename, 'rb') as file:
+        sample = file.read(sample_size)
+
+    for encoding in SUPPORTED_ENCODINGS:
+        # Incremental decoder tolerates a multi-byte character cut at the sample edge
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    return None
+
+def write_json_atomic(filename, data, **dump_options):
+    """
+    Writes data as JSON through a temporary file and os.replace, so an
+    interrupted write never leaves a truncated file behind
+    Keyword options are passed to json.dump.
+    """
+
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = filename + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, **dump_options)
+    os.replace(temp_path, filename)
+
+def _decode_line(line, encoding):
+    # Strict decode; a line the sniffed encoding rejects falls back to the
+    # next supported encoding instead of being corrupted with U+FFFD
+    try:
+        return line.decode(encoding)
+    except UnicodeDecodeError:
+        pass
+
+    for fallback in SUPPORTED_ENCODINGS[SUPPORTED_ENCODINGS.index(encoding) + 1:]:
+        try:
+            return line.decode(fallback)
+        except UnicodeDecodeError:
+            continue
+
+    raise ValueError(f"Unable to decode line with supported encodings: {line[:80]!r}")
+
+def decode_block(block, encoding):
+    """
+    Decodes a block of whole lines, once per block on the common path and
+    line by line with encoding fallback otherwise
+    Returns: list of decoded lines (the last is empty after a trailing newline)
+    """
+
+    try:
+        return block.decode(encoding).split('\n')
+    except UnicodeDecodeError:
+        return [_decode_line(line, encoding) for line in block.split(b'\n')]
+
+def iter_sales_data(filename, chunk_size=1 << 20):
+    """
+    Lazily reads sales data, decoding the file only once
+    Lines are pulled from disk in batches of roughly chunk_size bytes,
+    so memory stays constant regardless of file size. Decoding is strict:
+    a batch containing bytes the sniffed encoding rejects (e.g. a latin-1
+    character past the sniffed sample) is decoded line by line with the
+    next supported encoding as fallback.
+    Yields: raw transaction lines (strings), header and empty lines skipped
+    """
+
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return
+
+    if encoding is None:
+        print("Error: Unable to read file with supported encodings.")
+        return
+
+    with open(filename, 'rb') as file:
+        # Skip header
+        file.readline()
+
+        while True:
+            batch = file.readlines(chunk_size)
+            if not batch:
+                break
+
+            for line in decode_block(b''.join(batch), encoding):
+                line = line.strip()
+                if line:
+                    yield line
+
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues
     Returns: list of raw transaction lines (strings)
     """
 
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    lines = []
+    return list(iter_sales_data(filename))
 
-    for encoding in encodings:
-        try:
-            with open(filename, 'r', encoding=encoding) as file:
-                all_lines = file.readlines()
+def split_byte_ranges(filename, shard_count):
+    """
+    Splits a sales file into newline-aligned byte ranges, header excluded
+    Returns: list of (start, end) byte offsets covering every data line once
+    """
+
+    with open(filename, 'rb') as file:
+        file.readline()
+        data_start = file.tell()
+        file_size = file.seek(0, 2)
+
+        step = max((file_size - data_start) // max(shard_count, 1), 1)
+        boundaries = [data_start]
+
+        for position in range(data_start + step, file_size, step):
+            # Move each cut forward to the start of the next line
+            file.seek(position - 1)
+            file.readline()
+            boundary = file.tell()
+            if boundary > boundaries[-1] and boundary < file_size:
+                boundaries.append(boundary)
+
+        boundaries.append(file_size)
+
+    return [
+        (start, end)
+        for start, end in zip(boundaries, boundaries[1:])
+        if end > start
+    ]
+
+def iter_byte_range(filename, start, end, encoding='utf-8'):
+    """
+    Reads the lines of one newline-aligned byte range of a sales file
+    Yields: raw transaction lines (strings), empty lines skipped
+    """
+
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        position = start
+
+        while position < end:
+            line = file.readline()
+            if not line:
                 break
-        except UnicodeDecodeError:
-            continue
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-            return []
-    else:
+            position += len(line)
+
+            line = _decode_line(line, encoding).strip()
+            if line:
+                yield line
+
+def iter_sales_data_mmap(filename, chunk_size=1 << 22):
+    """
+    Reads sales data through a memory map instead of buffered reads
+    The mapped file is cut into newline-aligned blocks of roughly
+    chunk_size bytes, each decoded and split in one call, so lines match
+    iter_sales_data exactly and can be fed to parse_and_validate.
+    Yields: raw transaction lines (strings), header and empty lines skipped
+    """
+
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return
+
+    if encoding is None:
         print("Error: Unable to read file with supported encodings.")
-        return []
+        return
+
+    if os.path.getsize(filename) == 0:
+        return
+
+    with open(filename, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+
+            # Skip header
+            position = data.find(b'\n') + 1 or size
+
+            while position < size:
+                end = data.rfind(b'\n', position, position + chunk_size) + 1
+                if end <= position:
+                    # A line longer than chunk_size: take it whole
+                    end = data.find(b'\n', position + chunk_size) + 1 or size
 
-    # Skip header and remove empty lines
-    for line in all_lines[1:]:
-        line = line.strip()
-        if line:
-            lines.append(line)
+                for line in decode_block(data[position:end], encoding):
+                    line = line.strip()
+                    if line:
+                        yield line
 
-    return lines
+                position = end
@@ -0,0 +1,148 @@
+import json
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.aggregator import SalesAggregate
+from utils.checkpoint import file_fingerprint
+from utils.data_processor import aggregate_sales, parse_transactions_table
+from utils.file_handler import detect_encoding, iter_sales_data, write_json_atomic
+
+STATE_VERSION = 2
+
+def source_identity(filename):
+    """
+    Identifies a sales file by its content rather than its path
+    The size and file_fingerprint hashes decide whether two sources are the
+    same data; path and host are kept only to name it in messages.
+    Returns: dictionary with path, host, size, head and tail
+    """
+
+    size = os.path.getsize(filename)
+    fingerprint = file_fingerprint(filename, size)
+
+    return {
+        'path': os.path.abspath(filename),
+        'host': socket.gethostname(),
+        'size': size,
+        'head': fingerprint['head'],
+        'tail': fingerprint['tail']
+    }
+
+def _source_key(source):
+    return source['size'], source['head'], source['tail']
+
+def _source_name(source):
+    return f"{source['host']}:{source['path']}"
+
+def aggregate_file(filename, distinct='exact', precision=12):
+    """
+    Parses, validates and aggregates one sales file
+    Unlike iter_sales_data on its own, a missing or undecodable file raises
+    instead of aggregating to an empty state.
+    Returns: SalesAggregate
+    """
+
+    if detect_encoding(filename) is None:
+        raise ValueError(f"Unable to read {filename} with supported encodings")
+
+    table = parse_transactions_table(iter_sales_data(filename), validate=True)
+    return aggregate_sales(table, distinct, precision)
+
+def _aggregate_file(job):
+    # Runs in a worker process; the aggregate pickles as plain dicts and ints
+    filename, distinct, precision = job
+    return aggregate_file(filename, distinct, precision)
+
+def aggregate_files(filenames, workers=None, distinct='exact', precision=12):
+    """
+    Map step: aggregates many sales files, one file per task, and merges
+    the partial aggregates. Only the compact per-file states travel back
+    from the worker processes, never the rows.
+    Returns: (SalesAggregate, list of source identities covered)
+    """
+
+    # The same data named twice (or copied) would otherwise be counted twice
+    sources = {}
+    for filename in filenames:
+        source = source_identity(filename)
+        sources.setdefault(_source_key(source), source)
+    sources = list(sources.values())
+
+    jobs = [(source['path'], distinct, precision) for source in sources]
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+
+    merged = SalesAggregate(distinct, precision)
+
+    if workers == 1:
+        for job in jobs:
+            merged.merge(_aggregate_file(job))
+        return merged, sources
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(_aggregate_file, jobs):
+            merged.merge(partial)
+
+    return merged, sources
+
+def save_state(aggregate, filename, sources=()):
+    """
+    Writes a partial aggregate state, with the inputs it covers, as JSON
+    Sources are source_identity dictionaries, so reduce_states recognises
+    the same data from any node or path.
+    """
+
+    write_json_atomic(filename, {
+        'version': STATE_VERSION,
+        'sources': list(sources),
+        'aggregate': aggregate.to_dict()
+    }, separators=(',', ':'))
+
+def load_state(filename):
+    """
+    Loads a state written by save_state
+    Returns: (SalesAggregate, list of source identities)
+    """
+
+    with open(filename, 'r', encoding='utf-8') as file:
+        state = json.load(file)
+
+    if state.get('version') != STATE_VERSION:
+        raise ValueError(f"{filename}: unsupported state version {state.get('version')}")
+
+    return SalesAggregate.from_dict(state['aggregate']), state['sources']
+
+def reduce_states(filenames):
+    """
+    Reduce step: merges saved states in any order or grouping
+    States covering the same source twice are refused, since merging them
+    would double-count its rows.
+    Returns: (SalesAggregate, list of every source covered)
+    """
+
+    merged = None
+    sources = []
+    seen = {}
+
+    for filename in filenames:
+        aggregate, state_sources = load_state(filename)
+
+        overlap = [
+            f"{_source_name(source)} (already merged as {_source_name(seen[_source_key(source)])})"
+            for source in state_sources if _source_key(source) in seen
+        ]
+        if overlap:
+            raise ValueError(f"{filename} repeats already merged sources: {', '.join(overlap)}")
+        for source in state_sources:
+            seen[_source_key(source)] = source
+        sources.extend(state_sources)
+
+        if merged is None:
+            merged = aggregate
+        else:
+            merged.merge(aggregate)
+
+    if merged is None:
+        raise ValueError("No states to reduce")
+
+    return merged, sources
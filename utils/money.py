@@ -0,0 +1,22 @@
+PAISE_PER_RUPEE = 100
+
+def to_paise(rupees):
+    """
+    Converts a rupee amount held as a float (e.g. a parsed UnitPrice) to
+    integer paise, rounding away the binary representation error
+    This is the single rounding rule for prices: every parse path and
+    aggregate converts through it, so a price with more than two decimals
+    (e.g. 12.345) lands on the same paise in every run mode.
+    Returns: int
+    """
+
+    return round(rupees * PAISE_PER_RUPEE)
+
+def to_rupees(paise):
+    """
+    Converts integer paise back to rupees for display and the analytics
+    return values
+    Returns: float, exact to two decimal places
+    """
+
+    return paise / PAISE_PER_RUPEE
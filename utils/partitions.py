@@ -0,0 +1,256 @@
+import json
+import os
+from datetime import date as _date
+from itertools import islice
+
+from utils.file_handler import detect_encoding, iter_sales_data, iter_byte_range, write_json_atomic
+from utils.data_processor import parse_and_validate
+from utils.checkpoint import file_fingerprint, last_complete_line_end
+
+PARTITION_VERSION = 2
+MANIFEST_NAME = 'manifest.json'
+GRANULARITIES = ('day', 'month')
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+def _period(date, granularity):
+    return date if granularity == 'day' else date[:7]
+
+def _is_iso_date(value):
+    try:
+        _date.fromisoformat(value)
+    except ValueError:
+        return False
+    return len(value) == 10
+
+def _has_iso_date(transaction_id, date, *fields):
+    # parse_and_validate rule: partition paths and pruning need ISO dates
+    return _is_iso_date(date)
+
+def _format_row(tx):
+    return '|'.join((
+        tx['TransactionID'], tx['Date'], tx['ProductID'], tx['ProductName'],
+        str(tx['Quantity']), str(tx['UnitPrice']), tx['CustomerID'], tx['Region']
+    ))
+
+def load_manifest(directory):
+    """
+    Loads a partitioned store's manifest
+    Returns: manifest dictionary, or None when the store does not exist yet
+    """
+
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return None
+
+    if manifest.get('version') != PARTITION_VERSION:
+        raise ValueError(f"Unsupported partition manifest version {manifest.get('version')}")
+
+    return manifest
+
+def _save_manifest(directory, manifest):
+    write_json_atomic(os.path.join(directory, MANIFEST_NAME), manifest, indent=1)
+
+def _find_source(manifest, path):
+    for source in manifest['sources']:
+        if source['path'] == path:
+            return source
+    return None
+
+def ingest_partitions(data_file, directory, granularity='month', deduplicator=None, batch_size=100_000):
+    """
+    Validates a sales file and adds its rows to a date-partitioned store
+
+    Each ingest writes one new segment file per (day or month, region)
+    under directory, and manifest.json records each segment's row count,
+    byte size and min/max date so readers can prune without opening
+    files. Segments are written under temporary names and the manifest is
+    replaced last, so an interrupted ingest leaves nothing that readers or
+    a retry will pick up.
+
+    Sources are keyed by absolute path with the byte offset reached and a
+    fingerprint of the prefix before it. Re-ingesting a file that has
+    grown only reads the complete lines appended since; a file whose
+    ingested prefix changed is refused. The file is streamed in batches
+    of batch_size lines.
+    Returns: ingest stats dictionary
+    """
+
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown partition granularity: {granularity}")
+
+    manifest = load_manifest(directory) or {
+        'version': PARTITION_VERSION,
+        'granularity': granularity,
+        'next_part': 0,
+        'sources': [],
+        'partitions': []
+    }
+
+    if manifest['granularity'] != granularity:
+        raise ValueError(
+            f"{directory} is partitioned by {manifest['granularity']}, not {granularity}"
+        )
+
+    path = os.path.abspath(data_file)
+    source = _find_source(manifest, path)
+
+    if source is None:
+        encoding = detect_encoding(data_file)
+        if encoding is None:
+            raise ValueError("Unable to read file with supported encodings.")
+        # Skip header
+        with open(data_file, 'rb') as file:
+            file.readline()
+            start = file.tell()
+    else:
+        encoding = source['encoding']
+        start = source['fingerprint']['offset']
+        if (os.path.getsize(data_file) < start
+                or file_fingerprint(data_file, start) != source['fingerprint']):
+            raise ValueError(
+                f"{data_file} changed before byte {start}, which was already ingested; "
+                "rebuild the store to ingest a rewritten file"
+            )
+
+    end = last_complete_line_end(data_file, start)
+    if end == start:
+        return {'skipped': True, 'rows': 0, 'partitions_written': 0, 'rejected': {}}
+
+    os.makedirs(directory, exist_ok=True)
+
+    segments = {}
+    rejected = {}
+    rows_written = 0
+
+    lines = iter_byte_range(data_file, start, end, encoding)
+
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            break
+
+        # The date rule runs before deduplication, so a row rejected for its
+        # date never shadows a later valid row with the same TransactionID
+        valid, report = parse_and_validate(
+            batch, deduplicator=deduplicator, rules=(('date', _has_iso_date),)
+        )
+        for rule, count in report['rejected'].items():
+            rejected[rule] = rejected.get(rule, 0) + count
+
+        groups = {}
+        for tx in valid:
+            groups.setdefault((_period(tx['Date'], granularity), tx['Region']), []).append(tx)
+
+        for key, rows in groups.items():
+            entry = segments.get(key)
+            if entry is None:
+                period, region = key
+                entry = segments[key] = {
+                    'period': period,
+                    'region': region,
+                    # Regions are kept out of file names so any value is safe
+                    'path': f"{period}/part-{manifest['next_part'] + len(segments):05d}.txt",
+                    'rows': 0,
+                    'bytes': 0,
+                    'min_date': rows[0]['Date'],
+                    'max_date': rows[0]['Date']
+                }
+
+            segment_path = os.path.join(directory, entry['path'])
+            os.makedirs(os.path.dirname(segment_path), exist_ok=True)
+
+            text = '\n'.join(_format_row(tx) for tx in rows) + '\n'
+            if entry['rows'] == 0:
+                text = HEADER + '\n' + text
+            mode = 'w' if entry['rows'] == 0 else 'a'
+            with open(segment_path + '.tmp', mode, encoding='utf-8', newline='\n') as file:
+                file.write(text)
+
+            entry['rows'] += len(rows)
+            entry['bytes'] += len(text.encode('utf-8'))
+            entry['min_date'] = min(entry['min_date'], min(tx['Date'] for tx in rows))
+            entry['max_date'] = max(entry['max_date'], max(tx['Date'] for tx in rows))
+
+            rows_written += len(rows)
+
+    # Segments only become visible through the manifest, which is replaced last
+    for entry in segments.values():
+        segment_path = os.path.join(directory, entry['path'])
+        os.replace(segment_path + '.tmp', segment_path)
+
+    manifest['partitions'].extend(segments.values())
+    manifest['next_part'] += len(segments)
+
+    if source is None:
+        source = {'path': path, 'encoding': encoding}
+        manifest['sources'].append(source)
+    source['fingerprint'] = file_fingerprint(data_file, end)
+
+    _save_manifest(directory, manifest)
+
+    return {
+        'skipped': False,
+        'rows': rows_written,
+        'partitions_written': len(segments),
+        'rejected': rejected
+    }
+
+def select_partitions(manifest, start_date=None, end_date=None, region=None):
+    """
+    Picks the partitions that can hold rows for an inclusive date range and
+    optional region, using only the manifest metadata
+    Returns: list of manifest partition entries
+    """
+
+    return [
+        entry for entry in manifest['partitions']
+        if (start_date is None or entry['max_date'] >= start_date)
+        and (end_date is None or entry['min_date'] <= end_date)
+        and (region is None or entry['region'] == region)
+    ]
+
+def read_partitions(directory, start_date=None, end_date=None, region=None):
+    """
+    Reads transactions for a date range and region from a partitioned store
+    Partitions outside the range are pruned before any file is opened;
+    rows are only date-checked in partitions that straddle the range edge.
+    Returns: (list of transaction dictionaries, pruning stats dictionary)
+    """
+
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No partition manifest in {directory}")
+
+    selected = select_partitions(manifest, start_date, end_date, region)
+    transactions = []
+
+    for entry in selected:
+        rows, _ = parse_and_validate(
+            iter_sales_data(os.path.join(directory, entry['path'])),
+            validate=False
+        )
+
+        straddles = (
+            (start_date is not None and entry['min_date'] < start_date)
+            or (end_date is not None and entry['max_date'] > end_date)
+        )
+        if straddles:
+            rows = [
+                tx for tx in rows
+                if (start_date is None or tx['Date'] >= start_date)
+                and (end_date is None or tx['Date'] <= end_date)
+            ]
+
+        transactions.extend(rows)
+
+    stats = {
+        'partitions_total': len(manifest['partitions']),
+        'partitions_read': len(selected),
+        'bytes_total': sum(entry['bytes'] for entry in manifest['partitions']),
+        'bytes_read': sum(entry['bytes'] for entry in selected),
+        'rows': len(transactions)
+    }
+
+    return transactions, stats
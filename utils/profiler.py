@@ -0,0 +1,171 @@
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then left out of the profile
+    resource = None
+
+def _current_rss():
+    # Resident set size from /proc where available (Linux)
+    try:
+        with open('/proc/self/statm', 'rb') as file:
+            pages = int(file.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+def _peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux but bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+class RunProfiler:
+    """
+    Records wall time, throughput and memory for each pipeline stage
+
+    Wrap each stage in "with profiler.stage(name) as stage:" and set
+    stage['rows'] to the number of rows it handled. Timing and RSS are
+    always recorded and cost next to nothing; tracemalloc deltas are
+    recorded with trace_memory=True, and a cProfile dump per stage is
+    written to cprofile_dir when one is given. HTTP page latencies are
+    collected in latency_log, which fetch_all_products fills in.
+    """
+
+    def __init__(self, trace_memory=False, cprofile_dir=None):
+        self.trace_memory = trace_memory
+        self.cprofile_dir = cprofile_dir
+        self.stages = []
+        self.latency_log = []
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+
+        self._owns_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+        if cprofile_dir:
+            os.makedirs(cprofile_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Times the enclosed block as one stage
+        Yields: the stage record, so the block can fill in 'rows'
+        """
+
+        record = {'stage': name, 'rows': rows}
+
+        rss_before = _current_rss()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced_before, _ = tracemalloc.get_traced_memory()
+
+        profile = cProfile.Profile() if self.cprofile_dir else None
+        if profile:
+            profile.enable()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - start
+
+            if profile:
+                profile.disable()
+                dump = os.path.join(self.cprofile_dir, f"{len(self.stages) + 1:02d}-{name}.prof")
+                profile.dump_stats(dump)
+                record['cprofile'] = dump
+
+            record['seconds'] = round(elapsed, 6)
+            rows = record['rows']
+            record['rows_per_sec'] = round(rows / elapsed) if rows and elapsed else None
+
+            rss_after = _current_rss()
+            record['rss_bytes'] = rss_after
+            if rss_before is not None and rss_after is not None:
+                record['rss_delta_bytes'] = rss_after - rss_before
+            record['peak_rss_bytes'] = _peak_rss()
+
+            if self.trace_memory:
+                traced_after, traced_peak = tracemalloc.get_traced_memory()
+                record['traced_delta_bytes'] = traced_after - traced_before
+                record['traced_peak_bytes'] = traced_peak - traced_before
+
+            self.stages.append(record)
+
+    def http_summary(self):
+        """
+        Returns: dictionary summarising the recorded HTTP page latencies
+        """
+
+        latencies = sorted(entry['seconds'] for entry in self.latency_log)
+        if not latencies:
+            return {'requests': 0}
+
+        return {
+            'requests': len(latencies),
+            'retries': sum(entry['attempts'] - 1 for entry in self.latency_log),
+            'total_seconds': round(sum(latencies), 4),
+            'p50_seconds': _percentile(latencies, 0.5),
+            'p95_seconds': _percentile(latencies, 0.95),
+            'max_seconds': latencies[-1],
+            'pages': self.latency_log
+        }
+
+    def to_dict(self):
+        """
+        Returns: JSON-serialisable run profile
+        """
+
+        return {
+            'started_at': self.started_at,
+            'total_seconds': round(time.perf_counter() - self._started, 6),
+            'peak_rss_bytes': _peak_rss(),
+            'tracemalloc': self.trace_memory,
+            'stages': self.stages,
+            'http': self.http_summary()
+        }
+
+    def save(self, filename):
+        """
+        Writes the run profile as JSON
+        """
+
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def print_summary(self):
+        """
+        Prints one line per stage: seconds, rows/sec and RSS change
+        """
+
+        for record in self.stages:
+            rate = f"{record['rows_per_sec']:,} rows/s" if record['rows_per_sec'] else ""
+            delta = record.get('rss_delta_bytes')
+            rss = f"{delta / 2**20:+.1f} MB RSS" if delta is not None else ""
+            print(f"  {record['stage']:<12} {record['seconds']:>9.4f}s  {rate:>18}  {rss}")
+
+    def stop(self):
+        """
+        Stops tracemalloc once the run is over, if this profiler started it
+        """
+
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.file_handler import iter_sales_data
+from utils.data_processor import (
+    parse_and_validate,
+    aggregate_sales,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    heavy_hitter_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+from utils.transaction_index import TransactionIndex
+
+class SalesDataset:
+    """
+    Validated transactions for one version of the sales file, with the
+    index and aggregate built once up front
+    With top_k='sketch' the top products come from a Space-Saving sketch.
+    """
+
+    def __init__(self, data_file, version, top_k='exact', sketch_capacity=1000):
+        self.data_file = data_file
+        self.version = version
+        self.mtime = os.path.getmtime(data_file)
+
+        valid_transactions, report = parse_and_validate(iter_sales_data(data_file))
+
+        self.index = TransactionIndex(
+            valid_transactions,
+            total_input=report['parsed'],
+            invalid=report['parsed'] - report['valid']
+        )
+        self.rejected = report['rejected']
+        self.aggregate = aggregate_sales(valid_transactions)
+        self.heavy_products = None
+        if top_k == 'sketch':
+            # Every tracked product, so any ?n= up to the capacity is a slice
+            self.heavy_products = heavy_hitter_products(
+                valid_transactions, n=sketch_capacity, capacity=sketch_capacity
+            )
+        self.loaded_at = time.time()
+
+def _int_param(params, name, default):
+    value = params.get(name)
+    return int(value) if value else default
+
+def _float_param(params, name):
+    value = params.get(name)
+    return float(value) if value else None
+
+class SalesQueryService:
+    """
+    Holds the sales dataset hot in memory and answers analytics queries
+
+    Results are cached per (dataset version, path, query string) in a
+    bounded LRU. A background thread polls the source file and swaps in a
+    freshly loaded dataset when it changes, which also retires the cache.
+    """
+
+    def __init__(self, data_file, cache_size=256, reload_interval=5.0, top_k='exact'):
+        self.data_file = data_file
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.top_k = top_k
+
+        self._version = 1
+        self.dataset = SalesDataset(data_file, self._version, top_k=top_k)
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reloader = None
+
+    # -------------------------------
+    # Background reload
+    # -------------------------------
+    def start_reloader(self):
+        """
+        Starts polling the source file for changes in a daemon thread
+        """
+
+        if self.reload_interval and self._reloader is None:
+            self._reloader = threading.Thread(target=self._watch, daemon=True)
+            self._reloader.start()
+
+    def stop_reloader(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                if os.path.getmtime(self.data_file) != self.dataset.mtime:
+                    self.reload()
+            except OSError as e:
+                print("Reload skipped:", e)
+
+    def reload(self):
+        """
+        Loads the source file again and swaps it in atomically
+        """
+
+        dataset = SalesDataset(self.data_file, self._version + 1, top_k=self.top_k)
+
+        with self._lock:
+            self._version = dataset.version
+            self.dataset = dataset
+            self._cache.clear()
+
+        print(f"Reloaded {self.data_file} (version {dataset.version})")
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def query(self, path, params):
+        """
+        Answers one analytics query, from cache when possible
+        Returns: JSON-encoded response body (bytes)
+        """
+
+        dataset = self.dataset
+        key = (dataset.version, path, tuple(sorted(params.items())))
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        body = json.dumps(self._compute(dataset, path, params)).encode('utf-8')
+
+        with self._lock:
+            if dataset.version == self._version:
+                self._cache[key] = body
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return body
+
+    def _compute(self, dataset, path, params):
+        aggregate = dataset.aggregate
+
+        if path == '/summary':
+            return {
+                'version': dataset.version,
+                'loaded_at': dataset.loaded_at,
+                'transactions': aggregate.transaction_count,
+                'rejected': dataset.rejected,
+                'total_revenue': calculate_total_revenue(aggregate),
+                'regions': dataset.index.regions(),
+                'date_range': dataset.index.date_range()
+            }
+        if path == '/region-sales':
+            return region_wise_sales(aggregate)
+        if path == '/top-products':
+            n = _int_param(params, 'n', 5)
+            if dataset.heavy_products is not None:
+                # (ProductName, EstimatedQuantity, MaxError)
+                return dataset.heavy_products[:n]
+            return top_selling_products(aggregate, n=n)
+        if path == '/customers':
+            return customer_analysis(aggregate)
+        if path == '/daily-trend':
+            return daily_sales_trend(aggregate)
+        if path == '/peak-day':
+            return find_peak_sales_day(aggregate)
+        if path == '/low-products':
+            return low_performing_products(aggregate, threshold=_int_param(params, 'threshold', 10))
+        if path == '/filter':
+            filtered, summary = dataset.index.query(
+                region=params.get('region') or None,
+                min_amount=_float_param(params, 'min_amount'),
+                max_amount=_float_param(params, 'max_amount'),
+                start_date=params.get('start_date') or None,
+                end_date=params.get('end_date') or None
+            )
+            limit = _int_param(params, 'limit', 100)
+            return {
+                'summary': summary,
+                'total_revenue': calculate_total_revenue(filtered),
+                'transactions': filtered[:limit]
+            }
+
+        raise KeyError(path)
+
+def _make_handler(service):
+    class SalesQueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+            try:
+                body = service.query(url.path, params)
+                status = 200
+            except KeyError:
+                body = json.dumps({'error': f"Unknown endpoint {url.path}"}).encode('utf-8')
+                status = 404
+            except ValueError as e:
+                body = json.dumps({'error': str(e)}).encode('utf-8')
+                status = 400
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Keep the console quiet; queries are expected to be frequent
+            pass
+
+    return SalesQueryHandler
+
+def serve(data_file, host='127.0.0.1', port=8000, reload_interval=5.0, top_k='exact'):
+    """
+    Runs the local query service until interrupted
+
+    Endpoints (GET, JSON): /summary, /region-sales, /top-products?n=,
+    /customers, /daily-trend, /peak-day, /low-products?threshold=,
+    /filter?region=&min_amount=&max_amount=&start_date=&end_date=&limit=
+    top_k='sketch' answers /top-products from a Space-Saving sketch.
+    """
+
+    service = SalesQueryService(data_file, reload_interval=reload_interval, top_k=top_k)
+    service.start_reloader()
+
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    print(f"Serving sales analytics on http://{host}:{server.server_port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop_reloader()
+        server.server_close()
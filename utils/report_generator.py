@@ -1,103 +1,107 @@
+import heapq
 from datetime import datetime
-from collections import defaultdict
+from utils.data_processor import aggregate_sales
+from utils.api_handler import summarize_enrichment
+from utils.cube import SalesCube
+from utils.money import to_rupees
 
-def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
+def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt',
+                          aggregate=None, enrichment_summary=None, heavy_hitters=None):
     """
     Generates a comprehensive formatted sales report
+    Pass a precomputed SalesAggregate (or a SalesCube) and enrichment
+    summary to render in O(groups); otherwise both are derived from the
+    raw transactions.
+    When neither enriched transactions nor a summary is given, the API
+    section is marked as not run. heavy_hitters, a (products, customers)
+    pair of Space-Saving estimates, replaces the exact top 5 rankings.
     """
 
+    if aggregate is None:
+        aggregate = aggregate_sales(transactions)
+    elif isinstance(aggregate, SalesCube):
+        aggregate = aggregate.to_aggregate()
+    if enrichment_summary is None and enriched_transactions is not None:
+        enrichment_summary = summarize_enrichment(enriched_transactions)
+
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    total_transactions = len(transactions)
+    total_transactions = aggregate.transaction_count
 
     # -------------------------
     # OVERALL SUMMARY
     # -------------------------
-    total_revenue = sum(tx['Quantity'] * tx['UnitPrice'] for tx in transactions)
+    # Aggregates hold integer paise; convert once for display
+    total_revenue = to_rupees(aggregate.total_revenue)
     avg_order_value = total_revenue / total_transactions if total_transactions else 0
 
-    dates = sorted(tx['Date'] for tx in transactions)
-    date_range = f"{dates[0]} to {dates[-1]}" if dates else "N/A"
+    # Daily groups already hold every distinct date
+    if aggregate.daily:
+        date_range = f"{min(aggregate.daily)} to {max(aggregate.daily)}"
+    else:
+        date_range = "N/A"
 
     # -------------------------
     # REGION-WISE PERFORMANCE
     # -------------------------
-    region_data = defaultdict(lambda: {'sales': 0.0, 'count': 0})
-
-    for tx in transactions:
-        amount = tx['Quantity'] * tx['UnitPrice']
-        region_data[tx['Region']]['sales'] += amount
-        region_data[tx['Region']]['count'] += 1
+    region_data = aggregate.regions
 
     region_rows = []
     for region, data in region_data.items():
-        percent = (data['sales'] / total_revenue) * 100 if total_revenue else 0
-        region_rows.append((region, data['sales'], percent, data['count']))
+        percent = (data['total_sales'] / aggregate.total_revenue) * 100 if total_revenue else 0
+        region_rows.append((region, to_rupees(data['total_sales']), percent, data['transaction_count']))
 
     region_rows.sort(key=lambda x: x[1], reverse=True)
 
     # -------------------------
     # TOP PRODUCTS
     # -------------------------
-    product_data = defaultdict(lambda: {'qty': 0, 'rev': 0.0})
-    for tx in transactions:
-        product_data[tx['ProductName']]['qty'] += tx['Quantity']
-        product_data[tx['ProductName']]['rev'] += tx['Quantity'] * tx['UnitPrice']
+    product_data = aggregate.products
 
-    top_products = sorted(
+    top_products = heapq.nlargest(
+        5,
         product_data.items(),
-        key=lambda x: x[1]['qty'],
-        reverse=True
-    )[:5]
+        key=lambda x: x[1]['total_quantity']
+    )
 
     # -------------------------
     # TOP CUSTOMERS
     # -------------------------
-    customer_data = defaultdict(lambda: {'spent': 0.0, 'count': 0})
-    for tx in transactions:
-        customer_data[tx['CustomerID']]['spent'] += tx['Quantity'] * tx['UnitPrice']
-        customer_data[tx['CustomerID']]['count'] += 1
-
-    top_customers = sorted(
-        customer_data.items(),
-        key=lambda x: x[1]['spent'],
-        reverse=True
-    )[:5]
+    top_customers = heapq.nlargest(
+        5,
+        aggregate.customers.items(),
+        key=lambda x: x[1]['total_spent']
+    )
 
     # -------------------------
     # DAILY SALES TREND
     # -------------------------
-    daily_data = defaultdict(lambda: {'rev': 0.0, 'count': 0, 'customers': set()})
-    for tx in transactions:
-        amt = tx['Quantity'] * tx['UnitPrice']
-        daily_data[tx['Date']]['rev'] += amt
-        daily_data[tx['Date']]['count'] += 1
-        daily_data[tx['Date']]['customers'].add(tx['CustomerID'])
+    daily_data = aggregate.daily
 
     # -------------------------
     # PRODUCT PERFORMANCE
     # -------------------------
-    best_day = max(daily_data.items(), key=lambda x: x[1]['rev'])
+    best_day = max(daily_data.items(), key=lambda x: x[1]['revenue'])
 
     low_products = [
-        (p, d['qty'], d['rev'])
+        (p, d['total_quantity'], to_rupees(d['total_revenue']))
         for p, d in product_data.items()
-        if d['qty'] < 10
+        if d['total_quantity'] < 10
     ]
 
     avg_region_value = {
-        r: data['sales'] / data['count']
+        r: to_rupees(data['total_sales']) / data['transaction_count']
         for r, data in region_data.items()
     }
 
     # -------------------------
     # API ENRICHMENT SUMMARY
     # -------------------------
-    enriched_success = [tx for tx in enriched_transactions if tx.get('API_Match')]
-    failed_enrichment = [
-        tx['ProductName'] for tx in enriched_transactions if not tx.get('API_Match')
-    ]
+    if enrichment_summary is not None:
+        enriched_total = enrichment_summary['total']
+        enriched_success = enrichment_summary['enriched']
+        failed_enrichment = enrichment_summary['failed_products']
 
-    success_rate = (len(enriched_success) / len(enriched_transactions)) * 100 if enriched_transactions else 0
+        success_rate = (enriched_success / enriched_total) * 100 if enriched_total else 0
 
     # -------------------------
     # WRITE REPORT
@@ -123,30 +127,47 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
             f.write(f"{r:<10} ₹{s:>10,.2f}   {p:>6.2f}%     {c}\n")
         f.write("\n")
 
-        f.write("TOP 5 PRODUCTS\n")
-        f.write("-"*45 + "\n")
-        f.write("Rank  Product          Qty   Revenue\n")
-        for i, (p, d) in enumerate(top_products, 1):
-            f.write(f"{i:<5} {p:<15} {d['qty']:<5} ₹{d['rev']:,.2f}\n")
-        f.write("\n")
-
-        f.write("TOP 5 CUSTOMERS\n")
-        f.write("-"*45 + "\n")
-        f.write("Rank  Customer   Total Spent   Orders\n")
-        for i, (c, d) in enumerate(top_customers, 1):
-            f.write(f"{i:<5} {c:<10} ₹{d['spent']:,.2f}   {d['count']}\n")
-        f.write("\n")
+        if heavy_hitters is None:
+            f.write("TOP 5 PRODUCTS\n")
+            f.write("-"*45 + "\n")
+            f.write("Rank  Product          Qty   Revenue\n")
+            for i, (p, d) in enumerate(top_products, 1):
+                f.write(f"{i:<5} {p:<15} {d['total_quantity']:<5} ₹{to_rupees(d['total_revenue']):,.2f}\n")
+            f.write("\n")
+
+            f.write("TOP 5 CUSTOMERS\n")
+            f.write("-"*45 + "\n")
+            f.write("Rank  Customer   Total Spent   Orders\n")
+            for i, (c, d) in enumerate(top_customers, 1):
+                f.write(f"{i:<5} {c:<10} ₹{to_rupees(d['total_spent']):,.2f}   {d['purchase_count']}\n")
+            f.write("\n")
+        else:
+            sketch_products, sketch_customers = heavy_hitters
+
+            f.write("TOP 5 PRODUCTS (estimated)\n")
+            f.write("-"*45 + "\n")
+            f.write("Rank  Product          Qty (± error)\n")
+            for i, (p, q, e) in enumerate(sketch_products[:5], 1):
+                f.write(f"{i:<5} {p:<15} {q} ± {e}\n")
+            f.write("\n")
+
+            f.write("TOP 5 CUSTOMERS (estimated)\n")
+            f.write("-"*45 + "\n")
+            f.write("Rank  Customer   Total Spent (± error)\n")
+            for i, (c, s, e) in enumerate(sketch_customers[:5], 1):
+                f.write(f"{i:<5} {c:<10} ₹{s:,.2f} ± ₹{e:,.2f}\n")
+            f.write("\n")
 
         f.write("DAILY SALES TREND\n")
         f.write("-"*45 + "\n")
         f.write("Date         Revenue        Txns   Customers\n")
         for d, v in sorted(daily_data.items()):
-            f.write(f"{d}  ₹{v['rev']:>10,.2f}   {v['count']:<5} {len(v['customers'])}\n")
+            f.write(f"{d}  ₹{to_rupees(v['revenue']):>10,.2f}   {v['transaction_count']:<5} {len(v['customers'])}\n")
         f.write("\n")
 
         f.write("PRODUCT PERFORMANCE ANALYSIS\n")
         f.write("-"*45 + "\n")
-        f.write(f"Best Selling Day: {best_day[0]} (₹{best_day[1]['rev']:,.2f})\n")
+        f.write(f"Best Selling Day: {best_day[0]} (₹{to_rupees(best_day[1]['revenue']):,.2f})\n")
         f.write("Low Performing Products:\n")
         for p, q, r in low_products:
             f.write(f"- {p}: {q} units, ₹{r:,.2f}\n")
@@ -154,10 +175,13 @@ def generate_sales_report(transactions, enriched_transactions, output_file='outp
 
         f.write("API ENRICHMENT SUMMARY\n")
         f.write("-"*45 + "\n")
-        f.write(f"Total Enriched: {len(enriched_success)}\n")
-        f.write(f"Success Rate:  {success_rate:.2f}%\n")
-        f.write("Failed Products:\n")
-        for p in set(failed_enrichment):
-            f.write(f"- {p}\n")
+        if enrichment_summary is None:
+            f.write("Not run\n")
+        else:
+            f.write(f"Total Enriched: {enriched_success}\n")
+            f.write(f"Success Rate:  {success_rate:.2f}%\n")
+            f.write("Failed Products:\n")
+            for p in failed_enrichment:
+                f.write(f"- {p}\n")
 
     print(f"Comprehensive sales report generated: {output_file}")
@@ -0,0 +1,255 @@
+import base64
+import hashlib
+import heapq
+import math
+from itertools import count as _counter
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter sketch over weighted streams
+
+    Tracks at most capacity items. When a new item arrives and the sketch
+    is full, the item with the smallest count is replaced and the new item
+    inherits that count as its error. For every tracked item the true total
+    lies in [count - error, count], and any item whose true total exceeds
+    total_weight / capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self.total_weight = 0
+        self.counts = {}
+        self.errors = {}
+
+        # Min-heap of (count, seq, item); entries go stale when counts grow
+        self._heap = []
+        self._sequence = _counter()
+
+    def update(self, item, weight=1):
+        """
+        Adds weight to item's running total
+        """
+
+        self.total_weight += weight
+        counts = self.counts
+
+        if item in counts:
+            counts[item] += weight
+        elif len(counts) < self.capacity:
+            counts[item] = weight
+            self.errors[item] = 0
+        else:
+            evicted, floor = self._pop_minimum()
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[item] = floor + weight
+            self.errors[item] = floor
+
+        heapq.heappush(self._heap, (counts[item], next(self._sequence), item))
+
+        # Keep the lazily-invalidated heap proportional to capacity
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        sequence = self._sequence
+        self._heap = [(value, next(sequence), item) for item, value in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_minimum(self):
+        heap = self._heap
+        counts = self.counts
+
+        while True:
+            value, _, item = heapq.heappop(heap)
+            if counts.get(item) == value:
+                return item, value
+
+    def top(self, n):
+        """
+        Returns: list of (item, estimated_total, max_error) for the n
+        largest tracked items, largest first
+        """
+
+        return [
+            (item, value, self.errors[item])
+            for item, value in heapq.nlargest(n, self.counts.items(), key=lambda entry: entry[1])
+        ]
+
+    def __len__(self):
+        return len(self.counts)
+
+class HyperLogLog:
+    """
+    Mergeable HyperLogLog distinct-count sketch
+
+    Uses 2**precision one-byte registers (precision 4-16); the relative
+    standard error is about 1.04 / sqrt(2**precision). Registers are kept
+    in a sparse dict only while it is smaller than the dense bytearray
+    (about one entry per 32 registers), so small sets stay small. len() returns the current estimate, which lets a sketch stand in
+    for a set wherever only its size is read.
+    """
+
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+
+        self.precision = precision
+        self._sparse = {}
+        self._registers = None
+        # A dict entry plus its int key costs ~32x a one-byte register
+        self._sparse_limit = (1 << precision) // 32
+
+    @staticmethod
+    def _hash(value):
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    def add(self, value):
+        """
+        Adds one value to the sketch
+        """
+
+        hashed = self._hash(value)
+        precision = self.precision
+        index = hashed >> (64 - precision)
+        remainder = hashed & ((1 << (64 - precision)) - 1)
+        rank = (64 - precision) - remainder.bit_length() + 1
+
+        registers = self._registers
+        if registers is not None:
+            if rank > registers[index]:
+                registers[index] = rank
+            return
+
+        sparse = self._sparse
+        if rank > sparse.get(index, 0):
+            sparse[index] = rank
+            if len(sparse) > self._sparse_limit:
+                self._densify()
+
+    def update(self, values):
+        """
+        Adds every value from an iterable
+        """
+
+        for value in values:
+            self.add(value)
+
+    def _densify(self):
+        registers = bytearray(1 << self.precision)
+        for index, rank in self._sparse.items():
+            registers[index] = rank
+        self._registers = registers
+        self._sparse = {}
+
+    def merge(self, other):
+        """
+        Folds another sketch of the same precision into this one
+        Returns: self
+        """
+
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+
+        if other._registers is not None and self._registers is None:
+            self._densify()
+
+        if self._registers is not None:
+            registers = self._registers
+            if other._registers is not None:
+                for index, rank in enumerate(other._registers):
+                    if rank > registers[index]:
+                        registers[index] = rank
+            else:
+                for index, rank in other._sparse.items():
+                    if rank > registers[index]:
+                        registers[index] = rank
+            return self
+
+        sparse = self._sparse
+        for index, rank in other._sparse.items():
+            if rank > sparse.get(index, 0):
+                sparse[index] = rank
+        if len(sparse) > self._sparse_limit:
+            self._densify()
+
+        return self
+
+    def __ior__(self, other):
+        # Lets "entry |= other" merge sketches the same way it unions sets
+        if isinstance(other, HyperLogLog):
+            return self.merge(other)
+        self.update(other)
+        return self
+
+    def count(self):
+        """
+        Returns: estimated number of distinct values added (float)
+        """
+
+        m = 1 << self.precision
+
+        if self._registers is not None:
+            ranks = self._registers
+            zeros = ranks.count(0)
+        else:
+            ranks = self._sparse.values()
+            zeros = m - len(self._sparse)
+
+        harmonic = zeros + sum(2.0 ** -rank for rank in ranks if rank)
+
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+
+        estimate = alpha * m * m / harmonic
+
+        # Linear counting is more accurate while many registers are empty
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+
+        return estimate
+
+    def __len__(self):
+        return int(round(self.count()))
+
+    def to_dict(self):
+        """
+        Returns: JSON-serialisable form understood by HyperLogLog.from_dict
+        """
+
+        if self._registers is not None:
+            return {
+                'precision': self.precision,
+                'registers': base64.b64encode(bytes(self._registers)).decode('ascii')
+            }
+
+        return {
+            'precision': self.precision,
+            'sparse': {str(index): rank for index, rank in self._sparse.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuilds a sketch from the output of to_dict
+        Returns: HyperLogLog
+        """
+
+        sketch = cls(state['precision'])
+        if 'registers' in state:
+            sketch._registers = bytearray(base64.b64decode(state['registers']))
+        else:
+            sketch._sparse = {int(index): rank for index, rank in state['sparse'].items()}
+            if len(sketch._sparse) > sketch._sparse_limit:
+                sketch._densify()
+        return sketch
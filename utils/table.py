@@ -0,0 +1,206 @@
+from array import array
+from datetime import date as _date
+
+from utils.money import to_paise, to_rupees
+
+class _Dictionary:
+    """
+    Dictionary encoder mapping repeated strings to compact int codes
+    Codes are assigned in first-appearance order.
+    """
+
+    def __init__(self, values=None):
+        self.values = []
+        self.codes = {}
+        for value in values or []:
+            self.encode(value)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+class _StringColumn:
+    """
+    Packs high-cardinality strings into one UTF-8 buffer plus an offsets array
+    Avoids a separate str object per row for values that never repeat.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offsets = array('Q', [0])
+
+    def append(self, value):
+        self.buffer += value.encode('utf-8')
+        self.offsets.append(len(self.buffer))
+
+    def extend(self, other):
+        base = len(self.buffer)
+        self.buffer += other.buffer
+        self.offsets.extend(base + offset for offset in other.offsets[1:])
+
+    def __getitem__(self, index):
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+class TransactionTable:
+    """
+    Columnar, array-backed store for parsed transactions
+
+    Quantity and UnitPrice (in integer paise) live in typed arrays, Region,
+    ProductID, ProductName and CustomerID are dictionary-encoded into int codes and
+    dates are stored as proleptic Gregorian ordinals. Dates that are not
+    ISO formatted are kept verbatim in a small dictionary and stored as the
+    non-positive sentinel -(code + 1), which no real ordinal uses. TransactionIDs, which
+    never repeat, are packed into a single byte buffer. Iterating the table
+    yields transaction dictionaries, so it can be passed anywhere a list of
+    transactions is accepted.
+    """
+
+    ENCODED_COLUMNS = ('Region', 'ProductID', 'ProductName', 'CustomerID')
+
+    def __init__(self):
+        self.transaction_ids = _StringColumn()
+        self.dates = array('i')
+        self.quantities = array('q')
+        self.unit_paise = array('q')
+        self.raw_dates = _Dictionary()
+
+        self.dictionaries = {column: _Dictionary() for column in self.ENCODED_COLUMNS}
+        self.codes = {column: array('I') for column in self.ENCODED_COLUMNS}
+
+        # Date strings repeat heavily, so ordinal conversion is memoised
+        self._date_ordinals = {}
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """
+        Builds a table from an iterable of transaction dictionaries
+        Returns: TransactionTable
+        """
+
+        table = cls()
+        for tx in transactions:
+            table.append(
+                tx['TransactionID'], tx['Date'], tx['ProductID'], tx['ProductName'],
+                tx['Quantity'], to_paise(tx['UnitPrice']), tx['CustomerID'], tx['Region']
+            )
+        return table
+
+    def _date_ordinal(self, date_str):
+        ordinal = self._date_ordinals.get(date_str)
+        if ordinal is None:
+            try:
+                day = _date.fromisoformat(date_str)
+            except ValueError:
+                day = None
+
+            # Only exact YYYY-MM-DD strings round-trip through an ordinal
+            if day is not None and day.isoformat() == date_str:
+                ordinal = day.toordinal()
+            else:
+                ordinal = -self.raw_dates.encode(date_str) - 1
+            self._date_ordinals[date_str] = ordinal
+        return ordinal
+
+    def date_string(self, ordinal):
+        """
+        Converts a stored date ordinal (or sentinel) back to its string
+        """
+
+        if ordinal > 0:
+            return _date.fromordinal(ordinal).isoformat()
+        return self.raw_dates.values[-ordinal - 1]
+
+    def append(self, transaction_id, date, product_id, product_name,
+               quantity, unit_paise, customer_id, region):
+        """
+        Appends one transaction given its already converted field values
+        unit_paise is the UnitPrice in integer paise.
+        """
+
+        ordinal = self._date_ordinal(date)
+        dictionaries = self.dictionaries
+        codes = self.codes
+
+        self.transaction_ids.append(transaction_id)
+        self.dates.append(ordinal)
+        self.quantities.append(quantity)
+        self.unit_paise.append(unit_paise)
+        codes['Region'].append(dictionaries['Region'].encode(region))
+        codes['ProductID'].append(dictionaries['ProductID'].encode(product_id))
+        codes['ProductName'].append(dictionaries['ProductName'].encode(product_name))
+        codes['CustomerID'].append(dictionaries['CustomerID'].encode(customer_id))
+
+    def extend(self, other):
+        """
+        Appends every row of another table, re-mapping its dictionary codes
+        """
+
+        self.transaction_ids.extend(other.transaction_ids)
+
+        if other.raw_dates.values:
+            remap = [-self.raw_dates.encode(value) - 1 for value in other.raw_dates.values]
+            self.dates.extend(
+                ordinal if ordinal > 0 else remap[-ordinal - 1] for ordinal in other.dates
+            )
+        else:
+            self.dates.extend(other.dates)
+        self.quantities.extend(other.quantities)
+        self.unit_paise.extend(other.unit_paise)
+
+        for column in self.ENCODED_COLUMNS:
+            dictionary = self.dictionaries[column]
+            remap = [dictionary.encode(value) for value in other.dictionaries[column].values]
+            self.codes[column].extend(remap[code] for code in other.codes[column])
+
+    def column_values(self, column):
+        """
+        Returns: list of distinct values for a dictionary-encoded column
+        """
+
+        return self.dictionaries[column].values
+
+    def row(self, index):
+        """
+        Materialises a single row
+        Returns: transaction dictionary
+        """
+
+        dictionaries = self.dictionaries
+        codes = self.codes
+
+        return {
+            'TransactionID': self.transaction_ids[index],
+            'Date': self.date_string(self.dates[index]),
+            'ProductID': dictionaries['ProductID'].values[codes['ProductID'][index]],
+            'ProductName': dictionaries['ProductName'].values[codes['ProductName'][index]],
+            'Quantity': self.quantities[index],
+            'UnitPrice': to_rupees(self.unit_paise[index]),
+            'CustomerID': dictionaries['CustomerID'].values[codes['CustomerID'][index]],
+            'Region': dictionaries['Region'].values[codes['Region'][index]]
+        }
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def __getstate__(self):
+        # The ordinal memo is rebuilt on demand, so it is not pickled
+        state = self.__dict__.copy()
+        state['_date_ordinals'] = {}
+        return state
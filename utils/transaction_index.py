@@ -0,0 +1,246 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date as _date
+
+from utils.money import to_rupees
+from utils.table import TransactionTable
+
+def _iso_ordinal(date_str):
+    # Only exact YYYY-MM-DD strings order correctly; anything else sorts nowhere
+    try:
+        day = _date.fromisoformat(date_str)
+    except (TypeError, ValueError):
+        return 0
+    return day.toordinal() if day.isoformat() == date_str else 0
+
+def _parse_bound(date_str):
+    if date_str is None:
+        return None
+    ordinal = _iso_ordinal(date_str)
+    if not ordinal:
+        raise ValueError(f"Date filter must be YYYY-MM-DD, got {date_str!r}")
+    return ordinal
+
+def _row_columns(transactions):
+    # Region codes, amounts and date ordinals without building row dicts;
+    # non-ISO dates are stored as 0
+    if isinstance(transactions, TransactionTable):
+        regions = transactions.column_values('Region')
+        region_codes = transactions.codes['Region']
+        amounts = array('d', (
+            quantity * to_rupees(paise)
+            for quantity, paise in zip(transactions.quantities, transactions.unit_paise)
+        ))
+        dates = array('i', (max(ordinal, 0) for ordinal in transactions.dates))
+        return regions, region_codes, amounts, dates
+
+    regions = []
+    region_lookup = {}
+    region_codes = array('I')
+    amounts = array('d')
+    dates = array('i')
+    ordinals = {}
+
+    for tx in transactions:
+        region = tx['Region']
+        code = region_lookup.get(region)
+        if code is None:
+            code = region_lookup[region] = len(regions)
+            regions.append(region)
+        region_codes.append(code)
+        amounts.append(tx['Quantity'] * tx['UnitPrice'])
+
+        date_str = tx['Date']
+        ordinal = ordinals.get(date_str)
+        if ordinal is None:
+            ordinal = ordinals[date_str] = _iso_ordinal(date_str)
+        dates.append(ordinal)
+
+    return regions, region_codes, amounts, dates
+
+def filter_options(transactions):
+    """
+    Summarises what the filters can select in one pass, without indexing
+    Returns: (sorted regions, (min_amount, max_amount) or None,
+              (first_date, last_date) or None); dates are ISO strings and
+              only ISO dates are considered
+    """
+
+    regions, region_codes, amounts, dates = _row_columns(transactions)
+
+    used = sorted(regions[code] for code in set(region_codes))
+    amount_range = (min(amounts), max(amounts)) if amounts else None
+
+    iso_dates = [ordinal for ordinal in dates if ordinal]
+    date_range = None
+    if iso_dates:
+        date_range = (_date.fromordinal(min(iso_dates)).isoformat(),
+                      _date.fromordinal(max(iso_dates)).isoformat())
+
+    return used, amount_range, date_range
+
+class TransactionIndex:
+    """
+    One-time index over validated transactions for repeated filtering
+
+    Keeps a posting list of row ids per region and sorted amount and date
+    arrays. A query resolves each criterion with a dictionary lookup or
+    bisect, then checks the remaining criteria only against the smallest
+    candidate list, so it never rescans the full dataset. A TransactionTable
+    is indexed straight from its columns. Dates are compared as ordinals;
+    rows whose date is not YYYY-MM-DD never match a date filter.
+    """
+
+    def __init__(self, transactions, total_input=None, invalid=0):
+        if not isinstance(transactions, (list, TransactionTable)):
+            transactions = list(transactions)
+        self.transactions = transactions
+        self.total_input = len(self.transactions) + invalid if total_input is None else total_input
+        self.invalid = invalid
+
+        regions, region_codes, self._row_amounts, self._row_dates = _row_columns(transactions)
+        self._row_regions = [regions[code] for code in region_codes]
+
+        postings = [array('I') for _ in regions]
+        for row, code in enumerate(region_codes):
+            postings[code].append(row)
+        self.region_rows = {
+            region: rows for region, rows in zip(regions, postings) if rows
+        }
+
+        amount_order = sorted(range(len(self._row_amounts)), key=self._row_amounts.__getitem__)
+        self._amount_rows = array('I', amount_order)
+        self._sorted_amounts = array('d', (self._row_amounts[row] for row in amount_order))
+
+        dated_rows = [row for row, ordinal in enumerate(self._row_dates) if ordinal]
+        date_order = sorted(dated_rows, key=self._row_dates.__getitem__)
+        self._date_rows = array('I', date_order)
+        self._sorted_dates = array('i', (self._row_dates[row] for row in date_order))
+
+    def _row(self, row):
+        if isinstance(self.transactions, TransactionTable):
+            return self.transactions.row(row)
+        return self.transactions[row]
+
+    def regions(self):
+        """
+        Returns: sorted list of indexed regions
+        """
+
+        return sorted(self.region_rows)
+
+    def amount_range(self):
+        """
+        Returns: (min_amount, max_amount), or None when the index is empty
+        """
+
+        if not self._sorted_amounts:
+            return None
+        return self._sorted_amounts[0], self._sorted_amounts[-1]
+
+    def date_range(self):
+        """
+        Returns: (first_date, last_date) as ISO strings, or None when no
+        row has an ISO date
+        """
+
+        if not self._sorted_dates:
+            return None
+        return (_date.fromordinal(self._sorted_dates[0]).isoformat(),
+                _date.fromordinal(self._sorted_dates[-1]).isoformat())
+
+    def _amount_candidates(self, min_amount, max_amount):
+        low = 0 if min_amount is None else bisect_left(self._sorted_amounts, min_amount)
+        high = len(self._sorted_amounts) if max_amount is None else bisect_right(self._sorted_amounts, max_amount)
+        return self._amount_rows[low:max(low, high)]
+
+    def _date_candidates(self, start, end):
+        low = 0 if start is None else bisect_left(self._sorted_dates, start)
+        high = len(self._sorted_dates) if end is None else bisect_right(self._sorted_dates, end)
+        return self._date_rows[low:max(low, high)]
+
+    def _match(self, candidates, region, min_amount, max_amount, start, end):
+        row_regions = self._row_regions
+        row_amounts = self._row_amounts
+        row_dates = self._row_dates
+        dated = start is not None or end is not None
+
+        matches = []
+        for row in candidates:
+            if region and row_regions[row] != region:
+                continue
+            amount = row_amounts[row]
+            if min_amount is not None and amount < min_amount:
+                continue
+            if max_amount is not None and amount > max_amount:
+                continue
+            ordinal = row_dates[row]
+            if dated and not ordinal:
+                continue
+            if start is not None and ordinal < start:
+                continue
+            if end is not None and ordinal > end:
+                continue
+            matches.append(row)
+        return matches
+
+    def _candidates(self, region, min_amount, max_amount, start, end):
+        # Each active criterion narrows to a posting list or bisected slice
+        lists = []
+        if region:
+            lists.append(self.region_rows.get(region, array('I')))
+        if min_amount is not None or max_amount is not None:
+            lists.append(self._amount_candidates(min_amount, max_amount))
+        if start is not None or end is not None:
+            lists.append(self._date_candidates(start, end))
+
+        if not lists:
+            return None
+        return min(lists, key=len)
+
+    def _count(self, region=None, min_amount=None, max_amount=None, start=None, end=None):
+        candidates = self._candidates(region, min_amount, max_amount, start, end)
+        if candidates is None:
+            return len(self.transactions)
+        return len(self._match(candidates, region, min_amount, max_amount, start, end))
+
+    def count(self, region=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+        """
+        Counts matching transactions without materialising them
+        Returns: int
+        """
+
+        return self._count(region, min_amount, max_amount,
+                           _parse_bound(start_date), _parse_bound(end_date))
+
+    def query(self, region=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+        """
+        Filters indexed transactions; amount and date bounds are inclusive
+        Returns: (filtered_transactions in original order, filter_summary)
+        """
+
+        start = _parse_bound(start_date)
+        end = _parse_bound(end_date)
+        candidates = self._candidates(region, min_amount, max_amount, start, end)
+
+        if candidates is None:
+            rows = range(len(self.transactions))
+        else:
+            rows = sorted(self._match(candidates, region, min_amount, max_amount, start, end))
+
+        filtered = [self._row(row) for row in rows]
+
+        # Counts mirror validate_and_filter's region-then-amount accounting
+        after_region = self._count(region=region)
+        after_amount = self._count(region=region, min_amount=min_amount, max_amount=max_amount)
+
+        filter_summary = {
+            'total_input': self.total_input,
+            'invalid': self.invalid,
+            'filtered_by_region': len(self.transactions) - after_region,
+            'filtered_by_amount': after_region - after_amount,
+            'filtered_by_date': after_amount - len(filtered),
+            'final_count': len(filtered)
+        }
+
+        return filtered, filter_summary